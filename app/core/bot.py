@@ -141,6 +141,8 @@ class Tree(app_commands.CommandTree):
         guild: Snowflake | int | None = None,
     ) -> app_commands.AppCommand | None:
         def search_dict(d: AppCommandStore) -> app_commands.AppCommand | None:
+            if (cmd := d.get(value)) is not None:
+                return cmd
             for cmd_name, cmd in d.items():
                 if value == cmd_name or (str(value).isdigit() and int(value) == cmd.id):
                     return cmd
@@ -248,6 +248,11 @@ async def check_transaction_lock(ctx: Context) -> bool:
 
 
 def lock_transactions(func: callable) -> callable:
+    """Holds the author's transaction lock for the duration of the command.
+
+    The lock is per-user, so it is safe to wait on confirmations while holding it. Database connections are
+    not: commands should only ``acquire()`` one after any confirmation prompt has been answered.
+    """
     if inspect.isasyncgenfunction(func):
         @wraps(func)
         async def wrapper(cog: Cog, ctx: Context, /, *args, **kwargs) -> Any:
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import random
 from bisect import bisect_left
+from functools import lru_cache
 from typing import NamedTuple, TYPE_CHECKING
 
 from PIL import Image, ImageDraw
@@ -71,7 +72,7 @@ class Biome(NamedTuple):
         """Returns the layer for the given GRID y coordinate."""
         if y < 1:
             return self.layers[0]
-        return self.layers[bisect_left(self.layers, y, key=lambda layer: layer.depth) - 1]
+        return self.layers[bisect_left(_layer_depths(self), y) - 1]
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Biome):
@@ -82,6 +83,11 @@ class Biome(NamedTuple):
         return hash(self.key)
 
 
+@lru_cache(maxsize=None)
+def _layer_depths(biome: Biome) -> tuple[int, ...]:
+    return tuple(layer.depth for layer in biome.layers)
+
+
 class Biomes:
     backyard = Biome(
         key='backyard',
@@ -7,7 +7,7 @@ import warnings
 from collections import defaultdict
 from dataclasses import dataclass
 from enum import Enum
-from functools import partial
+from functools import cache, cached_property, partial
 from textwrap import dedent
 from typing import (
     Any,
@@ -15,7 +15,6 @@ from typing import (
     Callable,
     Collection,
     Final,
-    Generator,
     Generic,
     NamedTuple,
     TYPE_CHECKING,
@@ -27,7 +26,7 @@ from discord.ext.commands import BadArgument
 from discord.utils import format_dt
 
 from app.data.pets import Pet, Pets, generate_pet_weights
-from app.util.common import get_by_key, humanize_duration, humanize_list, ordinal, pluralize
+from app.util.common import get_by_key, humanize_duration, humanize_list, image_url_from_emoji, ordinal, pluralize
 from app.util.structures import DottedDict
 from config import Emojis
 
@@ -193,6 +192,16 @@ class EnemyRef(NamedTuple):
         return get_by_key(Enemies, self.ref)
 
 
+# Bits of Item.function_mask, keyed by the name of the corresponding Item attribute
+ITEM_FUNCTION_BITS: Final[dict[str, int]] = {
+    'buyable': 1 << 0,
+    'sellable': 1 << 1,
+    'usable': 1 << 2,
+    'giftable': 1 << 3,
+    'removable': 1 << 4,
+}
+
+
 @dataclass
 class Item(Generic[T]):
     """Stores data about an item."""
@@ -244,6 +253,8 @@ class Item(Generic[T]):
         if not self.plural:
             self.plural = self.name + 's'
 
+        self.function_mask: int = sum(bit for attr, bit in ITEM_FUNCTION_BITS.items() if getattr(self, attr))
+
     def __hash__(self) -> int:
         return hash(self.key)
 
@@ -260,6 +271,10 @@ class Item(Generic[T]):
     def display_name(self) -> str:
         return self.get_display_name()
 
+    @cached_property
+    def thumbnail_url(self) -> str:
+        return image_url_from_emoji(self.emoji)
+
     @property
     def usable(self) -> bool:
         return self.usage_callback is not None
@@ -287,10 +302,12 @@ class Item(Generic[T]):
 
     def to_use(self, func: UsageCallback) -> UsageCallback:
         self.usage_callback = func
+        self.function_mask |= ITEM_FUNCTION_BITS['usable']
         return func
 
     def to_remove(self, func: RemovalCallback) -> RemovalCallback:
         self.removal_callback = func
+        self.function_mask |= ITEM_FUNCTION_BITS['removable']
         return func
 
     async def use(self, ctx: Context, quantity: int) -> int:
@@ -2201,11 +2218,15 @@ class Items:
     )
 
     @classmethod
-    def all(cls) -> Generator[Item, Any, Any]:
-        """Lazily iterates through all items."""
-        for attr in dir(cls):
-            if isinstance(item := getattr(cls, attr), Item):
-                yield item
+    @cache
+    def all(cls) -> tuple[Item, ...]:
+        """Returns all items. The catalog never changes at runtime, so this is only computed once."""
+        return tuple(item for attr in dir(cls) if isinstance(item := getattr(cls, attr), Item))
+
+    @classmethod
+    def count(cls) -> int:
+        """Returns the number of unique items."""
+        return len(cls.all())
 
 
 ITEMS_INST = Items()
@@ -6,6 +6,7 @@ import json
 import random
 import secrets
 from abc import ABC, abstractmethod
+from bisect import bisect_left
 from collections import defaultdict, deque
 from dataclasses import dataclass
 from enum import IntEnum
@@ -35,6 +36,7 @@ from app.database.migrations import Migrator
 from app.util.common import (
     CubicCurve,
     ExponentialCurve,
+    cutoff,
     expansion_list,
     get_by_key,
     image_url_from_emoji,
@@ -173,6 +175,16 @@ class Database(_Database):
 
 
 class InventoryMapping(dict[Item, int]):
+    def __init__(self) -> None:
+        super().__init__()
+        # Running totals, kept in sync on every write so they never need a full pass
+        self.worth: int = 0
+        self.unique_count: int = 0
+
+    def _track(self, item: Item, old: int, new: int) -> None:
+        self.worth += (new - old) * (item.price or 0)
+        self.unique_count += (new > 0) - (old > 0)
+
     def get(self, k: Item | str, d: Any = None) -> int:
         try:
             return self[k]
@@ -201,8 +213,20 @@ class InventoryMapping(dict[Item, int]):
         if item is None:
             return
 
+        self._track(item, super().get(item, 0), value)
         return super().__setitem__(item, value)
 
+    def __delitem__(self, item: Item | str) -> None:
+        if isinstance(item, str):
+            item = get_by_key(Items, item)
+
+        self._track(item, super().__getitem__(item), 0)
+        super().__delitem__(item)
+
+    def clear(self) -> None:
+        super().clear()
+        self.worth = self.unique_count = 0
+
     def __contains__(self, item: Item | str) -> bool:
         if isinstance(item, str):
             item = get_by_key(Items, item)
@@ -225,6 +249,16 @@ class InventoryManager:
         await self._task
         return self
 
+    @property
+    def worth(self) -> int:
+        """The total worth of all items in this inventory."""
+        return self.cached.worth
+
+    @property
+    def unique_count(self) -> int:
+        """The number of unique items in this inventory with a positive quantity."""
+        return self.cached.unique_count
+
     async def fetch_items(self) -> None:
         query = 'SELECT * FROM items WHERE user_id = $1'
         records = await self._record.db.fetch(query, self._record.user_id)
@@ -236,7 +270,8 @@ class InventoryManager:
             if damage is not None:
                 self.damage[item] = damage
 
-    async def add_item(self, item: Item | str, amount: int = 1, *, connection: asyncpg.Connection | None = None) -> None:
+    async def add_item(self, item: Item | str, amount: int = 1, *, connection: asyncpg.Connection | None = None) -> int:
+        """Adds to the quantity of an item, returning its new quantity."""
         await self.wait()
 
         query = """
@@ -246,7 +281,8 @@ class InventoryManager:
                 """
 
         row = await (connection or self._record.db).fetchrow(query, self._record.user_id, str(item), amount)
-        self.cached[item] = row['count']
+        self.cached[item] = count = row['count']
+        return count
 
     async def _base_update(
         self,
@@ -273,12 +309,23 @@ class InventoryManager:
                 """
         await self._base_update(query, connection=connection, transform=lambda _, v: v, **items)
 
+    # $1 = user ID, $2 = item keys, $3 = quantities to add
+    BULK_ADD_QUERY = """
+        INSERT INTO items (user_id, item, count) SELECT $1, * FROM UNNEST($2::TEXT[], $3::BIGINT[])
+        ON CONFLICT (user_id, item) DO UPDATE SET count = items.count + excluded.count
+    """
+
     async def add_bulk(self, *, connection: asyncpg.Connection | None = None, **items: int) -> None:
-        query = """
-                INSERT INTO items (user_id, item, count) VALUES ($1, $2, $3)
-                ON CONFLICT (user_id, item) DO UPDATE SET count = items.count + $3
-                """
-        await self._base_update(query, connection=connection, transform=lambda p, v: p + v, **items)
+        """Adds to many items in one statement."""
+        await self.wait()
+        await (connection or self._record.db).execute(
+            self.BULK_ADD_QUERY, self._record.user_id, list(items.keys()), list(items.values()),
+        )
+        self._track_bulk_add(items)
+
+    def _track_bulk_add(self, items: dict[str, int]) -> None:
+        for k, v in items.items():
+            self.cached[k] = self.cached.get(k, 0) + v
 
     async def deal_damage(self, item: Item | str, damage: int, *, connection: asyncpg.Connection | None = None) -> tuple[int, bool]:
         """Deals damage to the item, removing it and resetting damage if it breaks."""
@@ -572,9 +619,32 @@ class _NotificationData(Protocol):
         ...
 
 
-class Notification(NamedTuple):
-    created_at: datetime.datetime
-    data: _NotificationData
+class Notification:
+    __slots__ = ('created_at', 'data', '_summary', '_relative_created_at')
+
+    def __init__(self, *, created_at: datetime.datetime, data: _NotificationData) -> None:
+        self.created_at: datetime.datetime = created_at
+        self.data: _NotificationData = data
+        self._summary: str | None = None
+        self._relative_created_at: str | None = None
+
+    @property
+    def relative_created_at(self) -> str:
+        """The relative Discord timestamp of when this notification was created."""
+        if self._relative_created_at is None:
+            self._relative_created_at = format_dt(self.created_at, 'R')
+        return self._relative_created_at
+
+    def summarize(self, bot: Bot) -> str:
+        """Returns the one-line summary shown in notification listings. Only computed on first access."""
+        if self._summary is None:
+            description = self.data.describe(bot)
+            if isinstance(self.data, NotificationData.BotUpdate):
+                self._summary = description.split('\n', 2)[1].removeprefix('-# ')
+            else:
+                self._summary = cutoff(description.partition('\n')[0], max_length=256)
+
+        return self._summary
 
     @classmethod
     def from_record(cls, record: asyncpg.Record) -> Notification:
@@ -582,6 +652,8 @@ class Notification(NamedTuple):
 
 
 class NotificationsManager:
+    MAX_NOTIFICATIONS = 1000
+
     def __init__(self, record: UserRecord) -> None:
         self.cached: list[Notification] | None = None
 
@@ -593,8 +665,8 @@ class NotificationsManager:
         return self
 
     async def fetch_notifications(self) -> None:
-        query = 'SELECT * FROM notifications WHERE user_id = $1 ORDER BY created_at DESC LIMIT 1000'
-        records = await self._record.db.fetch(query, self._record.user_id)
+        query = 'SELECT * FROM notifications WHERE user_id = $1 ORDER BY created_at DESC LIMIT $2'
+        records = await self._record.db.fetch(query, self._record.user_id, self.MAX_NOTIFICATIONS)
 
         self.cached = [Notification.from_record(record) for record in records]
 
@@ -1250,19 +1322,6 @@ class AbilityManager:
         self.cached[ability] = AbilityRecord.from_record(manager=self, record=record)
 
 
-class UserHistoryEntry(NamedTuple):
-    wallet: int
-    total: int
-
-    @property
-    def bank(self) -> int:
-        return self.total - self.wallet
-
-    @classmethod
-    def from_record(cls, record: asyncpg.Record) -> Self:
-        return cls(record['wallet'], record['total'])
-
-
 class StackType(IntEnum):
     additive = 0
     multiplicative = 1
@@ -1292,9 +1351,10 @@ class Multiplier(NamedTuple):
 
 def aggregate_multipliers(multipliers: Iterable[Multiplier]) -> float:
     multiplier = 1.0
+    additive = StackType.additive
 
     for m in multipliers:
-        if m.stack_type is StackType.additive:
+        if m.stack_type is additive:
             multiplier += m.multiplier
         else:
             multiplier *= m.multiplier
@@ -1545,6 +1605,11 @@ class QuestManager:
         self._pending_rerolls: dict[QuestSlot, int] = {}
         self._task = record.db.bot.loop.create_task(self.fetch())
 
+    @property
+    def fetched(self) -> bool:
+        """Whether quests have finished loading, i.e. whether :attr:`cached` can be read without waiting."""
+        return self._task.done()
+
     @property
     def all_active_quests(self) -> list[QuestRecord]:
         """Returns all active quests."""
@@ -1764,6 +1829,7 @@ class UserRecord(BaseRecord):
     """Stores data about a user."""
 
     ALCOHOL_ACTIVE_DURATION = datetime.timedelta(hours=2)
+    HISTORY_RETENTION = datetime.timedelta(weeks=2)
     LEVELING_CURVE = CubicCurve.default()
 
     def __init__(self, user_id: int, *, db: Database) -> None:
@@ -1771,8 +1837,12 @@ class UserRecord(BaseRecord):
         self.user_id: int = user_id
         self.data: dict[str, Any] = {}
 
-        self.history: list[tuple[datetime.datetime, UserHistoryEntry]] = []  # Experimental
+        # Experimental; stored as parallel columns so timespans can be bisected and sliced directly
+        self.history_timestamps: list[datetime.datetime] = []
+        self.history_wallet: list[int] = []
+        self.history_total: list[int] = []
         self.__history_fetched: bool = False
+        self.__level_data: tuple[int, tuple[int, int, int]] | None = None  # (total_exp, level_data)
 
         self.__inventory_manager: InventoryManager | None = None
         self.__notifications_manager: NotificationsManager | None = None
@@ -1786,15 +1856,31 @@ class UserRecord(BaseRecord):
         return f'<UserRecord user_id={self.user_id}>'
 
     async def update_history(self, connection: asyncpg.Connection) -> None:
-        if self.history:
-            _, previous = self.history[-1]
+        if self.history_timestamps:
             # Prevent a useless duplicate entry
-            if previous.wallet == self.wallet and previous.total == self.total_coins:
+            if self.history_wallet[-1] == self.wallet and self.history_total[-1] == self.total_coins:
                 return
 
         query = 'INSERT INTO user_coins_graph_data (user_id, wallet, total) VALUES ($1, $2, $3) RETURNING *;'
         record = await connection.fetchrow(query, self.user_id, self.wallet, self.total_coins)
-        self.history.append((record['timestamp'], UserHistoryEntry.from_record(record)))
+        self._append_history(record)
+        self._trim_history(record['timestamp'])
+
+    def _append_history(self, record: asyncpg.Record) -> None:
+        self.history_timestamps.append(record['timestamp'])
+        self.history_wallet.append(record['wallet'])
+        self.history_total.append(record['total'])
+
+    def _trim_history(self, now: datetime.datetime) -> None:
+        # Mirrors the expire_graph_data trigger so history does not grow for as long as the record is cached
+        threshold = now - self.HISTORY_RETENTION
+        if self.history_timestamps[0] >= threshold:
+            return
+
+        position = bisect_left(self.history_timestamps, threshold)
+        del self.history_timestamps[:position]
+        del self.history_wallet[:position]
+        del self.history_total[:position]
 
     async def fetch(self) -> UserRecord:
         await self.db.wait()
@@ -1813,14 +1899,17 @@ class UserRecord(BaseRecord):
 
     async def fetch_history(self, connection: asyncpg.Connection) -> None:
         self.__history_fetched = True
-        self.history = [
-            (record['timestamp'], UserHistoryEntry.from_record(record))
-            for record in await connection.fetch(
-                'SELECT * FROM user_coins_graph_data WHERE user_id = $1 ORDER BY timestamp',
-                self.user_id,
-            )
-        ]
-        if not self.history:
+        self.history_timestamps = []
+        self.history_wallet = []
+        self.history_total = []
+
+        for record in await connection.fetch(
+            'SELECT * FROM user_coins_graph_data WHERE user_id = $1 ORDER BY timestamp',
+            self.user_id,
+        ):
+            self._append_history(record)
+
+        if not self.history_timestamps:
             await self.update_history(connection=connection)
 
     async def fetch_if_necessary(self) -> UserRecord:
@@ -1839,19 +1928,24 @@ class UserRecord(BaseRecord):
         values: dict[str, Any],
         *,
         connection: asyncpg.Connection | None = None,
+        with_query: str | None = None,
+        with_args: tuple[Any, ...] = (),
     ) -> UserRecord:
+        """Updates the user's row.
+
+        If given, ``with_query`` runs in the same statement as a data-modifying CTE. It may reference the user ID
+        as ``$1`` and ``with_args`` as ``$2`` onwards.
+        """
         query = "/**/ UPDATE users SET {} WHERE user_id = $1 RETURNING *;"  # prevent language injection with /**/
+        query = query.format(', '.join(map(key, enumerate(values.keys(), start=2 + len(with_args)))))
+        if with_query is not None:
+            query = f'WITH _ AS ({with_query}) {query}'
+
         actual_conn = await self.db.acquire() if connection is None else connection
 
         # noinspection PyTypeChecker
         try:
-            self.data.update(
-                await actual_conn.fetchrow(
-                    query.format(', '.join(map(key, enumerate(values.keys(), start=2)))),
-                    self.user_id,
-                    *values.values(),
-                ),
-            )
+            self.data.update(await actual_conn.fetchrow(query, self.user_id, *with_args, *values.values()))
             await self.update_history(connection=actual_conn)
         finally:
             if connection is None:
@@ -1888,7 +1982,9 @@ class UserRecord(BaseRecord):
         multiplier = self.exp_multiplier_in_ctx(ctx)
         exp = round(exp * multiplier)
         await self.add(exp=exp, connection=connection)
+        return await self._handle_level_up(old, connection=connection)
 
+    async def _handle_level_up(self, old: int, *, connection: asyncpg.Connection | None = None) -> bool:
         if self.level > old:
             rewards = Reward()
             for milestone, reward in LEVEL_REWARDS.items():
@@ -1942,6 +2038,52 @@ class UserRecord(BaseRecord):
         await self.add_exp(amount, ctx=ctx, connection=connection)
         return amount
 
+    async def sell_items(
+        self, items: dict[Item, int], *, wallet: int, connection: asyncpg.Connection | None = None,
+    ) -> None:
+        """Removes the given quantities of items and adds ``wallet`` coins in a single statement."""
+        inventory = await self.inventory_manager.wait()
+        deltas = {item.key: -quantity for item, quantity in items.items()}
+
+        await self._update(
+            lambda o: f'"{o[1]}" = "{o[1]}" + ${o[0]}',
+            {'wallet': wallet},
+            connection=connection,
+            with_query=InventoryManager.BULK_ADD_QUERY,
+            with_args=(list(deltas.keys()), list(deltas.values())),
+        )
+        inventory._track_bulk_add(deltas)
+
+    async def add_with_random_gains(
+        self,
+        *,
+        exp: tuple[int, int],
+        bank_space: tuple[int, int],
+        exp_chance: float = 1,
+        bank_space_chance: float = 1,
+        ctx: Context | None = None,
+        connection: asyncpg.Connection | None = None,
+        **values: int,
+    ) -> None:
+        """Adds the given values alongside a random amount of EXP and bank space in a single query.
+
+        This is equivalent to calling :meth:`add_random_exp`, :meth:`add_random_bank_space` and :meth:`add`
+        one after the other, but only costs one round-trip to the database.
+        """
+        if random.random() <= exp_chance:
+            values['exp'] = values.get('exp', 0) + round(random.randint(*exp) * self.exp_multiplier_in_ctx(ctx))
+
+        if random.random() <= bank_space_chance:
+            added = round(random.randint(*bank_space) * self.bank_space_growth_multiplier)
+            values['max_bank'] = values.get('max_bank', 0) + added
+
+        if not values:
+            return
+
+        old = self.level
+        await self.add(connection=connection, **values)
+        await self._handle_level_up(old, connection=connection)
+
     async def make_dead(self, *, reason: str | None = None, connection: asyncpg.Connection | None = None) -> None:
         inventory = await self.inventory_manager.wait()
         quantity = inventory.cached.quantity_of('lifesaver')
@@ -2011,7 +2153,11 @@ class UserRecord(BaseRecord):
 
     @property
     def level_data(self) -> tuple[int, int, int]:
-        return self.LEVELING_CURVE.compute_level(self.total_exp)
+        # Memoized against the EXP it was computed from, so any write to the record invalidates it
+        total_exp = self.total_exp
+        if self.__level_data is None or self.__level_data[0] != total_exp:
+            self.__level_data = total_exp, self.LEVELING_CURVE.compute_level(total_exp)
+        return self.__level_data[1]
 
     @property
     def level(self) -> int:
@@ -25,7 +25,7 @@ from app.core import (
 from app.data.items import Item, ItemType, Items
 from app.data.quests import QuestTemplates
 from app.database import CropInfo, CropManager, UserRecord
-from app.util.common import cutoff, humanize_duration, image_url_from_emoji, query_collection_many
+from app.util.common import cutoff, humanize_duration, query_collection_many
 from app.util.converters import query_crop
 from app.util.types import CommandResponse, TypedInteraction
 from app.util.views import StaticCommandButton, UserView
@@ -352,7 +352,7 @@ class Farming(Cog):
         embed = discord.Embed(
             title=crop.name, description=crop.description, color=Colors.primary, timestamp=ctx.now,
         )
-        embed.set_thumbnail(url=image_url_from_emoji(crop.emoji))
+        embed.set_thumbnail(url=crop.thumbnail_url)
 
         embed.add_field(name='General', value=dedent(f"""
             **Name:** {crop.display_name}
@@ -4,8 +4,10 @@ import asyncio
 import datetime
 import math
 import random
+from bisect import bisect
 from collections import defaultdict, deque
 from datetime import timedelta
+from functools import lru_cache
 from html import unescape
 from textwrap import dedent
 from typing import Any, Generic, Literal, NamedTuple, Sequence, TypeVar, TYPE_CHECKING
@@ -2129,18 +2131,39 @@ class FishingView(UserView):
         await self.ctx.maybe_edit(embed=embed, view=await self._shortcuts())
 
 
+@lru_cache(maxsize=128)
+def _pressure_chance(depth: int) -> float:
+    k = 0.46  # this constant will change based on submarine
+    return -1 / (0.02 * depth ** k + 1) + 1
+
+
+@lru_cache(maxsize=128)
+def _dive_hazard_thresholds(depth: int) -> tuple[float, float, float]:
+    """Cumulative thresholds for pressure death, general death and loss at the given depth.
+
+    Each hazard only applies if the ones before it were survived, so bisecting a single uniform draw
+    against these thresholds is equivalent to rolling each hazard in turn.
+    """
+    pressure = _pressure_chance(depth) if depth > 50 else 0.0
+    # the general chances (0.01 death, 0.13 loss) will change based on submarine
+    death = pressure + (1 - pressure) * 0.01
+    loss = death + (1 - death) * 0.13
+    return pressure, death, loss
+
+
 class DivingView(UserView):
     def __init__(self, ctx: Context, *, record: UserRecord) -> None:
         self.record = record
         self.ctx = ctx
         super().__init__(ctx.author, timeout=30)
+        self._buttons: tuple[discord.ui.Button, ...] = (self.dive_deeper, self.surface)
 
         self._depth: int = 0
         self._oxygen: int = 50
 
         self._profit: int = 0
         self._multipliers_applied: bool = False
-        self._items: defaultdict[Item, int] = defaultdict(int)
+        self._item_counts: list[int] = [0] * len(self._ITEM_KEYS)
 
     def make_embed(self, *, message: str | None = None, error: bool = False, emoji: str = '\u23ec') -> discord.Embed:
         embed = discord.Embed(color=Colors.warning, timestamp=self.ctx.now)
@@ -2171,15 +2194,16 @@ class DivingView(UserView):
                 if self._multipliers_applied and coin_multiplier > 1 else ''
             )
             earnings.append(f'- {Emojis.coin} **{self._profit:,}**{with_multi}')
-        for item, quantity in self._items.items():
-            earnings.append(f'- {item.get_display_name(bold=True)} x{quantity}')
+        for item, quantity in zip(self._ITEM_KEYS, self._item_counts):
+            if quantity:
+                earnings.append(f'- {item.get_display_name(bold=True)} x{quantity}')
 
         embed.insert_field_at(0, name='Earnings', value='\n'.join(earnings) or 'Nothing yet!', inline=False)
         return embed
 
     async def suspend(self, interaction: TypedInteraction | None, message: str | None = None) -> None:
         self.stop()
-        for button in self.children:
+        for button in self._buttons:
             button.disabled = True
 
         if interaction is not None:
@@ -2190,7 +2214,7 @@ class DivingView(UserView):
 
     async def make_dead(self, interaction: TypedInteraction, message: str) -> None:
         self.stop()
-        for button in self.children:
+        for button in self._buttons:
             button.disabled = True
 
         await self.record.make_dead(reason=message)
@@ -2205,10 +2229,7 @@ class DivingView(UserView):
 
         See <https://www.desmos.com/calculator/bors91xu3x>
         """
-        depth = depth if depth is not None else self._depth
-
-        k = 0.46  # this constant will change based on submarine
-        return -1 / (0.02 * depth ** k + 1) + 1
+        return _pressure_chance(depth if depth is not None else self._depth)
 
     LOSS_MESSAGES = (
         'You got lost and surface back up without any coins or items.',
@@ -2221,6 +2242,8 @@ class DivingView(UserView):
         'You got attacked by a giant squid and died.',
         'You were eaten by a whale. You died.',
     )
+    _N_LOSS = len(LOSS_MESSAGES)
+    _N_DEATH = len(DEATH_MESSAGES)
     # this could maybe also change based on submarine
     ITEMS = {
         Items.fish: 0.15,
@@ -2234,33 +2257,40 @@ class DivingView(UserView):
         Items.dynamite: 0.07,
         Items.eel: 0.002,
     }
+    _ITEM_KEYS: tuple[Item, ...] = tuple(ITEMS)
+    _ITEM_INDICES: range = range(len(ITEMS))
+    _ITEM_WEIGHTS: tuple[float, ...] = tuple(ITEMS.values())
 
     @discord.ui.button(label='Dive Deeper', style=discord.ButtonStyle.primary, emoji='\u23ec')
     async def dive_deeper(self, interaction: TypedInteraction, _) -> None:
+        rand, randint, randrange, choices = random.random, random.randint, random.randrange, random.choices
+
         self._depth += 50
-        self._oxygen -= random.randint(5, 15)
+        self._oxygen -= randint(5, 15)
 
         if self._oxygen <= 0:
             return await self.make_dead(interaction, 'You ran out of oxygen and drowned. You died.')
-        # death due to pressure:
-        if self._depth > 50 and random.random() < self.calculate_pressure_chance():
+        # one draw decides between death due to pressure, general death, and general loss
+        outcome = bisect(_dive_hazard_thresholds(self._depth), rand())
+
+        if outcome == 0:
             return await self.make_dead(
                 interaction, 'You dive a bit too deep and the water pressure crushes you. You died.',
             )
-        # general loss chance
-        if random.random() < 0.01:  # this number will change based on submarine
-            return await self.make_dead(interaction, random.choice(self.DEATH_MESSAGES))
-        if random.random() < 0.13:  # this number will change based on submarine
-            return await self.suspend(interaction, random.choice(self.LOSS_MESSAGES))
+        if outcome == 1:
+            return await self.make_dead(interaction, self.DEATH_MESSAGES[randrange(self._N_DEATH)])
+        if outcome == 2:
+            return await self.suspend(interaction, self.LOSS_MESSAGES[randrange(self._N_LOSS)])
 
-        profit = random.randint(100, 250)
+        profit = randint(100, 250)
         self._profit += profit
 
         found = f'{Emojis.coin} **{profit:,}**'
 
-        if random.random() < 0.2:  # item chance. this number will change based on submarine
-            item = random.choices(list(self.ITEMS.keys()), weights=list(self.ITEMS.values()))[0]
-            self._items[item] += 1
+        if rand() < 0.2:  # item chance. this number will change based on submarine
+            index = choices(self._ITEM_INDICES, weights=self._ITEM_WEIGHTS)[0]
+            self._item_counts[index] += 1
+            item = self._ITEM_KEYS[index]
             found += f' and {item.get_sentence_chunk(bold=True)}'
 
         message = f'You dive deeper into the ocean. At **{self._depth:,} meters** deep you find an additional {found}.'
@@ -2268,12 +2298,13 @@ class DivingView(UserView):
 
     @discord.ui.button(label='Surface', style=discord.ButtonStyle.success, emoji='\u23eb')
     async def surface(self, interaction: TypedInteraction, button: discord.ui.Button):
-        self._profit = await self.record.add_coins(self._profit, ctx=self.ctx)
-        self._multipliers_applied = True
+        async with self.record.db.acquire() as conn, conn.transaction():
+            self._profit = await self.record.add_coins(self._profit, ctx=self.ctx, connection=conn)
+            kwargs = {item.key: quantity for item, quantity in zip(self._ITEM_KEYS, self._item_counts) if quantity}
+            if kwargs:
+                await self.record.inventory_manager.add_bulk(connection=conn, **kwargs)
 
-        async with self.record.db.acquire() as conn:
-            for item, quantity in self._items.items():
-                await self.record.inventory_manager.add_item(item, quantity, connection=conn)
+        self._multipliers_applied = True
 
         embed = self.make_embed(
             message='You come back up to the surface safely. Your dive was successful!',
@@ -2282,7 +2313,7 @@ class DivingView(UserView):
         embed.colour = Colors.success
 
         self.stop()
-        for button in self.children:
+        for button in self._buttons:
             button.disabled = True
 
         await interaction.response.edit_message(embed=embed, view=self)
@@ -2293,20 +2324,20 @@ class DivingView(UserView):
 
 
 class QuestsNavRow(discord.ui.ActionRow['QuestsView']):
-    def __init__(self, parent: QuestsContainer) -> None:
+    def __init__(self, container: QuestsContainer) -> None:
         super().__init__()
-        self.parent: QuestsContainer = parent
+        self.container: QuestsContainer = container
 
     def update(self) -> None:
-        if self.parent.showing_daily_quests:
+        if self.container.showing_daily_quests:
             self.toggle_daily_quests.label = 'See Recurring Quests'
         else:
             self.toggle_daily_quests.label = 'See Daily Quests'
 
     @discord.ui.button(label='See Daily Quests', style=discord.ButtonStyle.primary)
     async def toggle_daily_quests(self, interaction: TypedInteraction, _button: discord.ui.Button) -> Any:
-        self.parent.showing_daily_quests = not self.parent.showing_daily_quests
-        await self.parent.update()
+        self.container.showing_daily_quests = not self.container.showing_daily_quests
+        await self.container.update()
 
         await interaction.response.edit_message(view=self.view)
 
@@ -2321,6 +2352,11 @@ class RefreshQuestsButton(discord.ui.Button['QuestsView']):
         await interaction.response.edit_message(view=self.view)
 
 
+@lru_cache(maxsize=256)
+def _format_reroll_label(price: int) -> str:
+    return f'Reroll ({price:,} coins)'
+
+
 class RerollQuestButton(discord.ui.Button['QuestsView']):
     def __init__(self, container: QuestsContainer, slot: QuestSlot) -> None:
         assert slot is not QuestSlot.vote
@@ -2332,11 +2368,12 @@ class RerollQuestButton(discord.ui.Button['QuestsView']):
         assert self.quest is not None, 'There should be an active quest for this slot'
         self.price = 0 if self.container.view.record.quest_rerolls_remaining > 0 else self.quest.reroll_price
 
-        super().__init__(label='Reroll')
         if self.price:
-            self.style = discord.ButtonStyle.success
-            self.emoji = Emojis.coin
-            self.label = f'Reroll ({self.price:,} coins)'
+            super().__init__(
+                label=_format_reroll_label(self.price), style=discord.ButtonStyle.success, emoji=Emojis.coin,
+            )
+        else:
+            super().__init__(label='Reroll')
 
     async def callback(self, interaction: TypedInteraction):
         if self.price and self.view.record.wallet < self.price:
@@ -2407,16 +2444,20 @@ class QuestsContainer(discord.ui.Container['QuestsView']):
         else:
             show = quests.vote, quests.recurring_easy, quests.recurring_mid, quests.recurring_hard
 
+        ticket = Emojis.ticket
+        expansion = Emojis.Expansion
+        completed_bar = progress_bar(1.0, length=8, provider=Emojis.GreenProgressBars)
+
         for i, entry in enumerate(show):
             accessory = None
             if isinstance(entry, QuestRecord):
                 title = entry.quest.title
-                exp = [
-                    f'{progress_bar(entry.progress / entry.quest.max_progress)} {entry.progress:,}/{entry.quest.max_progress:,}',
-                    f'Reward: {Emojis.ticket} **{entry.quest.tickets:,}**',
-                ]
-                if entry.expires_at:
-                    exp.append(f'Expires {format_dt(entry.expires_at, "R")}')
+                bar = f'{progress_bar(entry.progress / entry.quest.max_progress)} {entry.progress:,}/{entry.quest.max_progress:,}'
+                reward = f'Reward: {ticket} **{entry.quest.tickets:,}**'
+                exp = expansion_list(
+                    (bar, reward, f'Expires {format_dt(entry.expires_at, "R")}')
+                    if entry.expires_at else (bar, reward)
+                )
                 if entry.quest.slot is not QuestSlot.vote:
                     accessory = RerollQuestButton(self, entry.quest.slot)
             else:
@@ -2424,13 +2465,13 @@ class QuestsContainer(discord.ui.Container['QuestsView']):
                 if not recent:
                     continue
                 title = recent.quest.title
-                exp = [
-                    f'{progress_bar(1.0, length=8, provider=Emojis.GreenProgressBars)} Completed!',
-                    f'You received {Emojis.ticket} **{recent.quest.tickets:,}**',
-                    f'Refreshes {format_dt(entry.refreshes_at, "R")}',
-                ]
+                exp = (
+                    f'{expansion.first} {completed_bar} Completed!\n'
+                    f'{expansion.mid} You received {ticket} **{recent.quest.tickets:,}**\n'
+                    f'{expansion.last} Refreshes {format_dt(entry.refreshes_at, "R")}'
+                )
 
-            content = f'**{title}**\n{expansion_list(exp)}'
+            content = f'**{title}**\n{exp}'
             self.add_item(
                 discord.ui.Section(content, accessory=accessory)
                 if accessory else discord.ui.TextDisplay(content)
@@ -2469,8 +2510,14 @@ class QuestsView(UserLayoutView):
         await self._container.update()
 
 
+@lru_cache(maxsize=len(QUEST_PASS_REWARDS) + 8)
+def _tier_window_emojis(tier: int) -> str:
+    return ' '.join(QuestPassContainer._get_reward_emoji(t) for t in range(tier - 2, tier + 5))
+
+
 class QuestPassContainer(discord.ui.Container['QuestPassView'], NavigableItem):
     REWARDS_PER_PAGE: int = 5
+    MAX_PAGES: int = math.ceil(len(QUEST_PASS_REWARDS) / REWARDS_PER_PAGE)
 
     def __init__(self, ctx: Context, record: UserRecord) -> None:
         super().__init__(accent_color=Colors.secondary)
@@ -2487,7 +2534,7 @@ class QuestPassContainer(discord.ui.Container['QuestPassView'], NavigableItem):
 
     @property
     def max_pages(self) -> int:
-        return math.ceil(len(QUEST_PASS_REWARDS) / self.REWARDS_PER_PAGE)
+        return self.MAX_PAGES
 
     async def set_page(self, itx: TypedInteraction, page: int):
         self.page = page
@@ -2495,6 +2542,7 @@ class QuestPassContainer(discord.ui.Container['QuestPassView'], NavigableItem):
         await itx.response.edit_message(view=self.view)
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def _get_reward_emoji(tier: int) -> str:
         out = None
         if reward := reward_for_achieving_tier(tier):
@@ -2511,7 +2559,7 @@ class QuestPassContainer(discord.ui.Container['QuestPassView'], NavigableItem):
         )).add_item(large_sep())
 
         tier, n, d = self.record.quest_pass_tier_data
-        emojis = ' '.join(self._get_reward_emoji(t) for t in range(tier - 2, tier + 5))
+        emojis = _tier_window_emojis(tier)
         chevron = (Emojis.space + ' ') * 2 + '\U0001f53a'  # type: ignore
         self.add_item(discord.ui.TextDisplay(f'## {emojis}\n## {chevron}')).add_item(large_sep())
         self.add_item(discord.ui.TextDisplay(
@@ -2520,10 +2568,8 @@ class QuestPassContainer(discord.ui.Container['QuestPassView'], NavigableItem):
             f'{Emojis.Expansion.last} Next tier reward: {reward_for_achieving_tier(tier + 1).short}'
         )).add_item(large_sep())
 
-        for i, reward in enumerate(
-            QUEST_PASS_REWARDS[self.page * self.REWARDS_PER_PAGE:(self.page + 1) * self.REWARDS_PER_PAGE],
-            start=self.page * self.REWARDS_PER_PAGE + 1,
-        ):
+        base = self.page * self.REWARDS_PER_PAGE
+        for i, reward in enumerate(QUEST_PASS_REWARDS[base:base + self.REWARDS_PER_PAGE], start=base + 1):
             if reward is None:
                 continue
             self.add_item(discord.ui.TextDisplay(
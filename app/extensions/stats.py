@@ -1,33 +1,41 @@
 from __future__ import annotations
 
-from bisect import bisect_left
-from datetime import datetime, timedelta
+import asyncio
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from copy import copy
+from datetime import timedelta
+from functools import lru_cache
 from math import ceil
 from io import BytesIO
+from logging import getLogger
+from operator import attrgetter, itemgetter
 from textwrap import dedent
-from typing import Any, Iterable, Literal, TYPE_CHECKING
+from typing import Any, Callable, Iterable, Literal, NamedTuple, TYPE_CHECKING
 
 import discord
 from discord import app_commands
 from discord.app_commands import Choice
+from discord.ext import tasks
 from discord.ext.commands import BadArgument
 from PIL import Image
 
 from app import Bot
 from app.core import BAD_ARGUMENT, Cog, Context, HybridContext, NO_EXTRA, REPLY, command, group, simple_cooldown
 from app.core.flags import Flags, flag, store_true
-from app.data.items import ItemRarity, ItemType, Item, Items, LEVEL_REWARDS
+from app.data.items import ITEM_FUNCTION_BITS, ItemRarity, ItemType, Item, Items, LEVEL_REWARDS
 from app.database import (
     InventoryManager,
     Multiplier,
+    Notification,
     NotificationData,
     NotificationsManager,
-    UserHistoryEntry,
     UserRecord,
     aggregate_multipliers,
 )
 from app.extensions.transactions import query_item_type
-from app.util.common import converter, cutoff, humanize_duration, image_url_from_emoji, progress_bar
+from app.util.common import converter, humanize_duration, image_url_from_emoji, progress_bar
 from app.util.converters import CaseInsensitiveMemberConverter, IntervalConverter
 from app.util.graphs import send_graph_to
 from app.util.pagination import (
@@ -46,6 +54,10 @@ if TYPE_CHECKING:
     from app.extensions.transactions import Transactions
     from app.util.types import CommandResponse, TypedInteraction
 
+log = getLogger(__name__)
+
+_LEVEL_MILESTONES: list[int] = sorted(LEVEL_REWARDS)
+
 _LB_SORT_BY_MAPPING: dict[str | None, str] = {
     None: 'wallet',
     'wallet': 'wallet',
@@ -71,13 +83,41 @@ _LB_SORT_BY_MAPPING: dict[str | None, str] = {
 }
 
 
+_LB_PODIUM_BULLETS: tuple[str, str, str] = ('\U0001f3c6', '\U0001f948', '\U0001f949')
+_LB_BULLET: str = '<:bullet:934890293902327838>'
+
+
 @converter
 async def LeaderboardSortByConverter(_ctx: Context, argument: str) -> str:
-    if alias := _LB_SORT_BY_MAPPING.get(argument.lower()):
+    # Most arguments are already lowercase, so try them as-is before allocating a lowercased copy
+    if alias := _LB_SORT_BY_MAPPING.get(argument) or _LB_SORT_BY_MAPPING.get(argument.lower()):
         return alias
     raise BadArgument()
 
 
+def _index_items_by_rarity() -> dict[str, tuple[Item, ...]]:
+    index = defaultdict(list)
+    for item in Items.all():
+        index['all'].append(item)
+        index[item.rarity.name.lower()].append(item)
+
+    return {key: tuple(items) for key, items in index.items()}
+
+
+_ITEMS_BY_RARITY: dict[str, tuple[Item, ...]] = _index_items_by_rarity()
+_RARITY_TITLES: dict[ItemRarity, str] = {rarity: rarity.name.title() for rarity in ItemRarity}
+_ITEM_TYPE_BY_NAME: dict[str, ItemType] = {type_.name: type_ for type_ in ItemType}
+_ITEM_TYPE_CHOICES: list[Choice[str]] = [Choice(name=type_.name.title(), value=type_.name) for type_ in ItemType]
+
+
+@lru_cache(maxsize=None)
+def _get_book_items(rarity: str, category: ItemType | None) -> tuple[Item, ...]:
+    items = _ITEMS_BY_RARITY.get(rarity, ())
+    if category is None:
+        return items
+    return tuple(item for item in items if item.type is category)
+
+
 class LeaderboardFlags(Flags):
     is_global = store_true(
         name='global', short='g',
@@ -85,10 +125,16 @@ class LeaderboardFlags(Flags):
     )
 
 
-class LeaderboardFormatter(Formatter[tuple[UserRecord, discord.Member]]):
+class LeaderboardEntry(NamedTuple):
+    record: UserRecord
+    user: discord.User | discord.Member | None
+
+
+class LeaderboardFormatter(Formatter[LeaderboardEntry]):
     def __init__(
         self,
-        records: list[tuple[UserRecord, discord.Member]],
+        ctx: Context,
+        records: list[LeaderboardEntry],
         *,
         per_page: int,
         is_global: bool,
@@ -97,6 +143,18 @@ class LeaderboardFormatter(Formatter[tuple[UserRecord, discord.Member]]):
         self.is_global = is_global
         self.attr = attr
 
+        try:
+            self._render_stat: Callable[[UserRecord], str] = self.STAT_RENDERERS[attr]
+        except KeyError:
+            raise ValueError(f'Unknown leaderboard attribute: {attr}')
+
+        # noinspection PyTypeChecker
+        self._author_kwargs: dict[str, Any] = (
+            dict(name='Coined: Global Leaderboard (Top 100)')
+            if is_global
+            else dict(name=f'Leaderboard: {ctx.guild.name}', icon_url=ctx.guild.icon)
+        )
+
         super().__init__(records, per_page=per_page)
         self.records = records
 
@@ -109,50 +167,31 @@ class LeaderboardFormatter(Formatter[tuple[UserRecord, discord.Member]]):
         'deepest_dig': 'Sorted by deepest dig (any biome)',
     }
 
-    async def format_page(self, paginator: Paginator, entries: list[tuple[UserRecord, discord.Member]]) -> discord.Embed:
+    STAT_RENDERERS: dict[str, Callable[[UserRecord], str]] = {
+        'wallet': lambda record: f'{Emojis.coin} **{record.wallet:,}**',
+        'bank': lambda record: f'{Emojis.coin} **{record.bank:,}**',
+        'total_coins': lambda record: f'{Emojis.coin} **{record.total_coins:,}**',
+        'total_exp': lambda record: f'**Level {record.level:,}** \u2022 {record.exp:,} XP',
+        'votes_this_month': lambda record: f'**{record.votes_this_month:,} votes**',
+        'deepest_dig': lambda record: f'**{record.deepest_dig:,} meters**',
+    }
+
+    async def format_page(self, paginator: Paginator, entries: list[LeaderboardEntry]) -> discord.Embed:
+        ctx = paginator.ctx
+        render_stat = self._render_stat
         result = []
 
-        for i, (record, user) in enumerate(entries, start=paginator.current_page * 10):
-            match i:
-                case 0:
-                    start = '\U0001f3c6'
-                case 1:
-                    start = '\U0001f948'
-                case 2:
-                    start = '\U0001f949'
-                case _:
-                    start = '<:bullet:934890293902327838>'
-
-            record: UserRecord
+        # Only the visible rows are rendered
+        for i, (record, user) in enumerate(entries, start=paginator.current_page * self.per_page):
+            start = _LB_PODIUM_BULLETS[i] if i < 3 else _LB_BULLET
             anonymize = self.is_global and record.anonymous_mode and not (
-                paginator.ctx.guild and record.user_id in paginator.ctx.guild._members
-                or record.user_id == paginator.ctx.author.id
+                ctx.guild and record.user_id in ctx.guild._members or record.user_id == ctx.author.id
             )
             name = '*Anonymous User*' if anonymize else discord.utils.escape_markdown(str(user))
+            result.append(f'{start} {render_stat(record)} \u2014 {name} {Emojis.get_prestige_emoji(record.prestige)}')
 
-            match self.attr:
-                case 'wallet' | 'bank' | 'total_coins':
-                    stat = f'{Emojis.coin} **{getattr(record, self.attr):,}**'
-                case 'total_exp':
-                    stat = f'**Level {record.level:,}** \u2022 {record.exp:,} XP'
-                case 'votes_this_month':
-                    stat = f'**{record.votes_this_month:,} votes**'
-                case 'deepest_dig':
-                    stat = f'**{record.deepest_dig:,} meters**'
-                case _:
-                    raise ValueError(f'Unknown leaderboard attribute: {self.attr}')
-
-            result.append(
-                f'{start} {stat} \u2014 {name} {Emojis.get_prestige_emoji(record.prestige)}'
-            )
-
-        embed = discord.Embed(color=Colors.primary, description='\n'.join(result), timestamp=paginator.ctx.now)
-        # noinspection PyTypeChecker
-        if self.is_global:
-            embed.set_author(name='Coined: Global Leaderboard (Top 100)')
-        else:
-            embed.set_author(name=f'Leaderboard: {paginator.ctx.guild.name}', icon_url=paginator.ctx.guild.icon)
-
+        embed = discord.Embed(color=Colors.primary, description='\n'.join(result), timestamp=ctx.now)
+        embed.set_author(**self._author_kwargs)
         embed.set_footer(text=self.ATTR_TEXT[self.attr])
         return embed
 
@@ -199,16 +238,39 @@ class RefreshInventoryButton(discord.ui.Button):
         await interaction.response.edit_message(view=self.view)
 
 
+_INVENTORY_SORT_OPTIONS: tuple[discord.SelectOption, ...] = (
+    discord.SelectOption(label='Sort by Name (A-Z)', value='name', default=True),
+    discord.SelectOption(label='Sort by Individual Price', value='price'),
+    discord.SelectOption(label='Sort by Total Sell Value', value='sell'),
+    discord.SelectOption(label='Sort by Quantity Owned', value='quantity'),
+)
+_INVENTORY_RARITY_OPTIONS: tuple[discord.SelectOption, ...] = tuple(
+    discord.SelectOption(label=rarity.name.title(), value=rarity.name.lower(), emoji=rarity.emoji)
+    for rarity in ItemRarity
+)
+_INVENTORY_TYPE_OPTIONS: tuple[discord.SelectOption, ...] = tuple(
+    discord.SelectOption(label=category.name.title(), value=category.name.lower())
+    for category in ItemType
+)
+_INVENTORY_FUNCTION_OPTIONS: tuple[discord.SelectOption, ...] = (
+    discord.SelectOption(label='Buyable', value='buyable'),
+    discord.SelectOption(label='Sellable', value='sellable'),
+    discord.SelectOption(label='Usable', value='usable'),
+    discord.SelectOption(label='Giftable', value='giftable'),
+    discord.SelectOption(label='Disposable', value='removable'),
+)
+
+
+def _copy_options(options: Iterable[discord.SelectOption]) -> list[discord.SelectOption]:
+    # Each select gets shallow copies since recompute_entries toggles their default flag
+    return list(map(copy, options))
+
+
 class InventorySortBy(discord.ui.Select['InventoryView']):
     def __init__(self, parent: InventoryContainer) -> None:
         super().__init__(
             placeholder='Sort by...',
-            options=[
-                discord.SelectOption(label='Sort by Name (A-Z)', value='name', default=True),
-                discord.SelectOption(label='Sort by Individual Price', value='price'),
-                discord.SelectOption(label='Sort by Total Sell Value', value='sell'),
-                discord.SelectOption(label='Sort by Quantity Owned', value='quantity'),
-            ],
+            options=_copy_options(_INVENTORY_SORT_OPTIONS),
         )
         self.parent = parent
 
@@ -228,13 +290,7 @@ class InventoryFilterByRarity(discord.ui.Select['InventoryView']):
     def __init__(self, parent: InventoryContainer) -> None:
         super().__init__(
             placeholder='Filter by rarity...',
-            options=[
-                discord.SelectOption(
-                    label=rarity.name.title(), value=rarity.name.lower(),
-                    emoji=rarity.emoji,
-                )
-                for rarity in ItemRarity
-            ],
+            options=_copy_options(_INVENTORY_RARITY_OPTIONS),
             min_values=0,
             max_values=len(ItemRarity),
         )
@@ -250,13 +306,7 @@ class InventoryFilterByType(discord.ui.Select['InventoryView']):
     def __init__(self, parent: InventoryContainer) -> None:
         super().__init__(
             placeholder='Filter by type...',
-            options=[
-                discord.SelectOption(
-                    label=category.name.title(),
-                    value=category.name.lower(),
-                )
-                for category in ItemType
-            ],
+            options=_copy_options(_INVENTORY_TYPE_OPTIONS),
             min_values=0,
             max_values=len(ItemType),
         )
@@ -272,13 +322,7 @@ class InventoryFilterByFunction(discord.ui.Select['InventoryView']):
     def __init__(self, parent: InventoryContainer) -> None:
         super().__init__(
             placeholder='Filter by function...',
-            options=[
-                discord.SelectOption(label='Buyable', value='buyable'),
-                discord.SelectOption(label='Sellable', value='sellable'),
-                discord.SelectOption(label='Usable', value='usable'),
-                discord.SelectOption(label='Giftable', value='giftable'),
-                discord.SelectOption(label='Disposable', value='removable'),
-            ],
+            options=_copy_options(_INVENTORY_FUNCTION_OPTIONS),
             min_values=0,
             max_values=5,
         )
@@ -323,9 +367,19 @@ class InventoryToggleRow(discord.ui.ActionRow['InventoryView']):
         await interaction.response.edit_message(view=self.view)
 
 
+_INVENTORY_SORT_KEYS: dict[str, Callable[[tuple[Item, int]], Any]] = {
+    'name': lambda pair: pair[0].key,  # item keys are always lowercase
+    'price': lambda pair: -pair[0].price,
+    'sell': lambda pair: -pair[0].sell * pair[1],
+    'quantity': lambda pair: -pair[1],
+}
+
+
 class InventoryContainer(discord.ui.Container['InventoryView'], NavigableItem):
     def __init__(self) -> None:
         super().__init__(accent_color=Colors.primary)
+        # Rendered page text keyed by (page, compact view, sort by); cleared whenever entries change
+        self._page_cache: dict[tuple[int, bool, str], list[str]] = {}
         self.reset_filters()
 
         self._current_page = 0
@@ -336,6 +390,7 @@ class InventoryContainer(discord.ui.Container['InventoryView'], NavigableItem):
         self.entries: list[tuple[Item, int]] = []  # Ordered list of (item, quantity) tuples
 
     def reset_filters(self) -> None:
+        self._page_cache.clear()
         self._sort_by = InventorySortBy(self)
         self._filter_by_type = InventoryFilterByType(self)
         self._filter_by_rarity = InventoryFilterByRarity(self)
@@ -377,42 +432,34 @@ class InventoryContainer(discord.ui.Container['InventoryView'], NavigableItem):
 
     @property
     def inventory_worth(self) -> int:
-        return sum(item.price * quantity for item, quantity in self.inventory.cached.items())
+        return self.inventory.worth
 
     @property
     def unique_count(self) -> int:
-        return len(self.inventory.cached)
+        return self.inventory.unique_count
 
     def recompute_entries(self) -> None:
-        match self._sort_by.value:
-            case 'name':
-                sort_predicate = lambda pair: pair[0].key.lower()
-            case 'price':
-                sort_predicate = lambda pair: -pair[0].price
-            case 'sell':
-                sort_predicate = lambda pair: -pair[0].sell * pair[1]
-            case 'quantity':
-                sort_predicate = lambda pair: -pair[1]
-            case _:
-                raise ValueError(f'Unknown sort by value: {self._sort_by.values[0]}')
-
-        filter_predicates = []
-        if self._filter_by_type.values:
-            filter_predicates.append(lambda item: item.type.name.lower() in self._filter_by_type.values)
-        if self._filter_by_rarity.values:
-            filter_predicates.append(lambda item: item.rarity.name.lower() in self._filter_by_rarity.values)
-        if self._filter_by_function.values:
-            filter_predicates.append(
-                lambda item: any(getattr(item, func) for func in self._filter_by_function.values)
-            )
+        try:
+            sort_predicate = _INVENTORY_SORT_KEYS[self._sort_by.value]
+        except KeyError:
+            raise ValueError(f'Unknown sort by value: {self._sort_by.values[0]}')
+
+        # Option values are the lowercased enum member names
+        types = frozenset(ItemType[value] for value in self._filter_by_type.values)
+        rarities = frozenset(ItemRarity[value] for value in self._filter_by_rarity.values)
+        functions = sum(ITEM_FUNCTION_BITS[value] for value in self._filter_by_function.values)
 
         self.entries = sorted(
             (
                 (item, quantity) for item, quantity in self.inventory.cached.items()
-                if quantity > 0 and all(predicate(item) for predicate in filter_predicates)
+                if quantity > 0
+                and (not types or item.type in types)
+                and (not rarities or item.rarity in rarities)
+                and (not functions or item.function_mask & functions)
             ),
             key=sort_predicate,
         )
+        self._page_cache.clear()
 
         # this is in case the client refreshes
         for select in (self._filter_by_type, self._filter_by_rarity, self._filter_by_function):
@@ -424,6 +471,33 @@ class InventoryContainer(discord.ui.Container['InventoryView'], NavigableItem):
         end = start + self.per_page
         return self.entries[start:end]
 
+    def render_page(self) -> list[str]:
+        key = self._current_page, self._compact_view, self._sort_by.value
+        if (cached := self._page_cache.get(key)) is not None:
+            return cached
+
+        entries = self.get_page_entries()
+        if self._compact_view:
+            lines = ['\n'.join(
+                f'{item.get_display_name(bold=True)} \u2014 {quantity:,}' for item, quantity in entries
+            )]
+        else:
+            sell = self._sort_by.value == 'sell'
+            lines = [
+                f'{item.get_display_name(bold=True)} \u2014 {quantity:,}\n'
+                f'\u2002{Emojis.Expansion.standalone} ' + (
+                    f'Sell all for {Emojis.coin} **{item.sell * quantity:,}**'
+                    if sell
+                    else f'Worth {Emojis.coin} **{item.price * quantity:,}**'
+                )
+                for item, quantity in entries
+            ]
+
+        if len(self._page_cache) >= 8:
+            del self._page_cache[next(iter(self._page_cache))]
+        self._page_cache[key] = lines
+        return lines
+
     async def set_page(self, interaction: TypedInteraction, page: int) -> Any:
         self._current_page = page
         self.update()
@@ -438,36 +512,26 @@ class InventoryContainer(discord.ui.Container['InventoryView'], NavigableItem):
         self.add_item(discord.ui.Section(
             f'## {self.user}\'s Inventory',
             f'-# {your_inventory} is worth {Emojis.coin} **{self.inventory_worth:,}**.\n'
-            f'-# Additionally, {you_own} **{self.unique_count:,}** out of {len(list(Items.all())):,} unique items.',
+            f'-# Additionally, {you_own} **{self.unique_count:,}** out of {Items.count():,} unique items.',
             accessory=RefreshInventoryButton(self),
         ))
         self.add_item(discord.ui.Separator(spacing=discord.SeparatorSpacing.large))
 
-        if not sum(self.inventory.cached.values()):
+        if not self.unique_count:
             self.add_item(discord.ui.TextDisplay('You currently do not own any items. Maybe buy some?'))
             return
 
-        entries = self.get_page_entries()
         if not self.entries:
             self.add_item(discord.ui.TextDisplay(
                 'You currently do not own any items that match the selected filters.'
             ))
         elif self._compact_view:
-            self.add_item(discord.ui.TextDisplay('\n'.join(
-                f'{item.get_display_name(bold=True)} \u2014 {quantity:,}' for item, quantity in entries
-            )))
+            self.add_item(discord.ui.TextDisplay(self.render_page()[0]))
         else:
-            for i, (item, quantity) in enumerate(entries):
-                extra = (
-                    f'Sell all for {Emojis.coin} **{item.sell * quantity:,}**'
-                    if self._sort_by.value == 'sell'
-                    else f'Worth {Emojis.coin} **{item.price * quantity:,}**'
-                )
-                self.add_item(discord.ui.TextDisplay(
-                    f'{item.get_display_name(bold=True)} \u2014 {quantity:,}\n'
-                    f'\u2002{Emojis.Expansion.standalone} {extra}'
-                ))
-                if i < len(entries) - 1 or not self._show_filters:
+            lines = self.render_page()
+            for i, line in enumerate(lines):
+                self.add_item(discord.ui.TextDisplay(line))
+                if i < len(lines) - 1 or not self._show_filters:
                     self.add_item(discord.ui.Separator(visible=False))
 
         if self._show_filters:
@@ -498,6 +562,16 @@ class InventoryView(UserLayoutView):
         self.container = container
 
 
+def _render_graph_background() -> bytes:
+    with Image.new("RGB", (30, 30), (0, 0, 0)) as background:
+        buffer = BytesIO()
+        background.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+
+_GRAPH_BACKGROUND_PNG: bytes = _render_graph_background()
+
+
 class Stats(Cog):
     """Useful statistical commands. These commands do not have any action behind them."""
 
@@ -510,9 +584,16 @@ class Stats(Cog):
             name='View Balance', callback=self._balance_context_menu_callback,
         )
         bot.tree.add_command(self._balance_context_menu)
+        self._guild_count_dirty: bool = False
+
+    async def cog_load(self) -> None:
+        self.flush_guild_count.start()
 
     async def cog_unload(self) -> None:
         self.bot.tree.remove_command(self._balance_context_menu.name, type=self._balance_context_menu.type)
+        self.flush_guild_count.cancel()
+        # Don't lose the latest guild count if it changed since the last flush
+        await self.flush_guild_count()
 
     def _generate_balance_stats(
         self, user: discord.User, data: UserRecord, color: int,
@@ -572,19 +653,20 @@ class Stats(Cog):
         embed.set_author(name=f"Level: {user}", icon_url=user.display_avatar.url)
 
         level, exp, requirement = data.level_data
+        ratio = exp / requirement
         extra = ''
         if multi := data.exp_multiplier_in_ctx(ctx) - 1:
             extra = f'-# XP Multiplier: **+{multi:.1%}**'
 
         embed.add_field(
             name=f"Level {level:,}",
-            value=f'{exp:,}/{requirement:,} XP ({exp / requirement:.1%})\n{progress_bar(exp / requirement)}\n' + extra,
+            value=f'{exp:,}/{requirement:,} XP ({ratio:.1%})\n{progress_bar(ratio)}\n' + extra,
         )
 
-        not_earned = ((milestone, reward) for milestone, reward in LEVEL_REWARDS.items() if level < milestone)
-        next_reward = min(not_earned, default=(None, None), key=lambda x: x[0])
-        if ctx.author == user and next_reward[0]:
-            milestone, reward = next_reward
+        index = bisect_right(_LEVEL_MILESTONES, level)
+        if ctx.author == user and index < len(_LEVEL_MILESTONES):
+            milestone = _LEVEL_MILESTONES[index]
+            reward = LEVEL_REWARDS[milestone]
             embed.add_field(
                 name=f'\U0001f3c5 Next Milestone: Level {milestone:,}',
                 value=f'Upon reaching this level, you will be rewarded:\n{reward}',
@@ -677,26 +759,33 @@ class Stats(Cog):
             flags.is_global = True
 
         assert sort_by in ('wallet', 'bank', 'total_coins', 'total_exp', 'votes_this_month', 'deepest_dig')
+        user_records = ctx.db.user_records
         population = (
-            ctx.db.user_records.values()
+            user_records.values()
             if flags.is_global
-            else (ctx.db.user_records[id] for id in ctx.guild._members if id in ctx.db.user_records)
-        )
-        records = sorted(
-            (
-                (record, ctx.guild and ctx.guild.get_member(record.user_id) or ctx.bot.get_user(record.user_id))
-                for record in population if getattr(record, sort_by) > 0
-            ),
-            key=lambda r: getattr(r[0], sort_by),
-            reverse=True,
+            else map(user_records.__getitem__, ctx.guild._members.keys() & user_records.keys())
         )
+        # Read each score once and rank on the plain number
+        key = attrgetter(sort_by)
+        scored = [(score, record) for record in population if (score := key(record)) > 0]
         if sort_by == 'votes_this_month':
-            records = [
-                (record, user) for record, user in records
+            scored = [
+                (score, record) for score, record in scored
                 if record.last_dbl_vote and record.last_dbl_vote.month == ctx.now.month
             ]
         if flags.is_global:
-            records = records[:100]  # TODO: perf improvements here
+            # Only the top 100 are shown, so avoid sorting the entire cache
+            scored = heapq.nlargest(100, scored, key=itemgetter(0))
+        else:
+            scored.sort(key=itemgetter(0), reverse=True)
+
+        # Resolve users only for the records that made the cut
+        records = [
+            LeaderboardEntry(
+                record, ctx.guild and ctx.guild.get_member(record.user_id) or ctx.bot.get_user(record.user_id),
+            )
+            for _, record in scored
+        ]
 
         if not records:
             message = "I don't see anyone in the cache with any coins"
@@ -704,7 +793,7 @@ class Stats(Cog):
                 message += " who is in this server"
             return message + '.'
 
-        fmt = LeaderboardFormatter(records, per_page=10, is_global=flags.is_global, attr=sort_by)
+        fmt = LeaderboardFormatter(ctx, records, per_page=10, is_global=flags.is_global, attr=sort_by)
         return Paginator(ctx, fmt, timeout=120), REPLY
 
     @leaderboard.define_app_command()
@@ -763,20 +852,19 @@ class Stats(Cog):
         rarity = rarity.lower()
 
         lines = [
-            f'{item.get_display_name(bold=quantity(item) > 0)} ({item.rarity.name.title()}) x{quantity(item):,}'
-            for item in Items.all()
-            if rarity in ('all', item.rarity.name.lower())
-            and (category is None or item.type is category)
+            f'{item.get_display_name(bold=owned > 0)} ({_RARITY_TITLES[item.rarity]}) x{owned:,}'
+            for item in _get_book_items(rarity, category)
+            for owned in (quantity(item),)
         ]
 
-        count = sum(quantity > 0 for quantity in inventory.cached.values())
+        count = inventory.unique_count
 
         embed = discord.Embed(color=Colors.primary, timestamp=ctx.now)
         embed.set_author(name=f'{ctx.author.name}\'s Item Book', icon_url=ctx.author.display_avatar)
-        embed.description = f'You own **{count:,}** out of {len(list(Items.all())):,} unique items.'
+        embed.description = f'You own **{count:,}** out of {Items.count():,} unique items.'
 
         if rarity != 'all':
-            count = sum(quantity > 0 for item, quantity in inventory.cached.items() if item.rarity.name.lower() == rarity)
+            count = sum(1 for item in _ITEMS_BY_RARITY[rarity] if quantity(item) > 0)
             embed.description += f'\nYou have also discovered {count:,} out of {len(lines):,} **{rarity.lower()}** items.'
 
         return Paginator(ctx, LineBasedFormatter(embed, lines, field_name='\u200b'), timeout=120), REPLY
@@ -786,40 +874,26 @@ class Stats(Cog):
         rarity='Show only items of this rarity.',
         category='Show only items from this category.',
     )
-    @app_commands.choices(category=[Choice(name=cat.name.title(), value=cat.name) for cat in list(ItemType)])
+    @app_commands.choices(category=_ITEM_TYPE_CHOICES)
     async def book_app_command(
         self,
         ctx: HybridContext,
         rarity: Literal['Common', 'Uncommon', 'Rare', 'Epic', 'Legendary', 'Mythic'] = None,
         category: str = None,
     ):
-        await ctx.invoke(ctx.command, rarity=(rarity or 'all').lower(), category=category and query_item_type(category))  # type: ignore
+        await ctx.invoke(ctx.command, rarity=(rarity or 'all').lower(), category=category and _ITEM_TYPE_BY_NAME.get(category))  # type: ignore
 
     @group(aliases={"notifs", "notification", "notif", "nt"}, hybrid=True, fallback='list')
     @simple_cooldown(1, 6)
     async def notifications(self, ctx: Context) -> tuple[str | Paginator, Any]:
         """View your notifications."""
         record = await ctx.db.get_user_record(ctx.author.id)
-        notifications = await record.notifications_manager.wait()
-
-        await record.update(unread_notifications=0)
-
-        newline = '\n'
-        fields = [{
-            'name': (
-                f'{idx}. {notification.data.emoji} **{notification.data.title}** \u2014 '
-                f'{discord.utils.format_dt(notification.created_at, "R")}'
-            ),
-            'value': (
-                f'{notification.data.describe(ctx.bot).split(newline)[1].removeprefix("-# ")}\n'
-                f'-# Run `{ctx.clean_prefix}notifications view {idx}` for the changelog'
-                if isinstance(notification.data, NotificationData.BotUpdate)
-                else cutoff(notification.data.describe(ctx.bot).splitlines()[0], max_length=256)
-            ),
-            'inline': False,
-        } for idx, notification in enumerate(notifications.cached, start=1)]
+        notifications, _ = await asyncio.gather(
+            record.notifications_manager.wait(),
+            record.update(unread_notifications=0),
+        )
 
-        if not len(fields):
+        if not notifications.cached:
             return 'You currently do not have any notifications.', REPLY
 
         embed = discord.Embed(color=Colors.primary, timestamp=ctx.now)
@@ -829,14 +903,30 @@ class Stats(Cog):
         )
         embed.set_author(name=f'{ctx.author.name}\'s Notifications', icon_url=ctx.author.display_avatar)
 
-        return Paginator(ctx, FieldBasedFormatter(embed, fields, per_page=5), timeout=120), REPLY
+        def make_field(idx: int, notification: Notification) -> dict[str, Any]:
+            return {
+                'name': (
+                    f'{idx}. {notification.data.emoji} **{notification.data.title}** \u2014 '
+                    f'{notification.relative_created_at}'
+                ),
+                'value': (
+                    f'{notification.summarize(ctx.bot)}\n'
+                    f'-# Run `{ctx.clean_prefix}notifications view {idx}` for the changelog'
+                    if isinstance(notification.data, NotificationData.BotUpdate)
+                    else notification.summarize(ctx.bot)
+                ),
+                'inline': False,
+            }
+
+        formatter = FieldBasedFormatter(embed, notifications.cached.copy(), per_page=5, field_factory=make_field)
+        return Paginator(ctx, formatter, timeout=120), REPLY
 
     @notifications.command(name='view', aliases={"v", "read", "info"}, hybrid=True)
     @app_commands.describe(index='The index of the notification to view.')
     @simple_cooldown(2, 3)
     async def notifs_view(self, ctx: Context, index: int) -> tuple[discord.Embed | str, Any]:
         """View information on a specific notification."""
-        if index < -1:
+        if index < 1:
             return 'Notification index must be positive.', BAD_ARGUMENT
 
         record = await ctx.db.get_user_record(ctx.author.id)
@@ -858,18 +948,21 @@ class Stats(Cog):
         else:
             embed.set_thumbnail(url=image_url_from_emoji(notification.data.emoji))
 
-        fmt = lambda f: discord.utils.format_dt(notification.created_at, f)
-        embed.add_field(name='Created', value=f'{fmt("R")} ({fmt("f")})')
+        embed.add_field(
+            name='Created',
+            value=f'{notification.relative_created_at} ({discord.utils.format_dt(notification.created_at, "f")})',
+        )
         return embed, REPLY
 
     @notifications.command(name='clear', aliases={"c", "wipe"}, hybrid=True)
     @simple_cooldown(1, 10)
     async def notifs_clear(self, ctx: Context) -> tuple[str, Any]:
         """Clear all of your notifications."""
-        await ctx.db.execute('DELETE FROM notifications WHERE user_id = $1', ctx.author.id)
-
         record = await ctx.db.get_user_record(ctx.author.id)
-        notifications = await record.notifications_manager.wait()
+        _, notifications = await asyncio.gather(
+            ctx.db.execute('DELETE FROM notifications WHERE user_id = $1', ctx.author.id),
+            record.notifications_manager.wait(),
+        )
         notifications.cached.clear()
 
         return 'Cleared all of your notifications.', REPLY
@@ -887,7 +980,7 @@ class Stats(Cog):
         - `{PREFIX}graph --total --timespan 1h`: Graph your total coins over the past hour.
         - `{PREFIX}graph --timespan 1d`: Graph your wallet over the past day.
         """
-        if flags.duration > timedelta(days=14):
+        if flags.duration > UserRecord.HISTORY_RETENTION:
             return 'You may only graph up to 14 days of data.', BAD_ARGUMENT
         if flags.duration < timedelta(minutes=2):
             return 'You must graph at least 2 minutes of data.', BAD_ARGUMENT
@@ -895,21 +988,21 @@ class Stats(Cog):
         record = await ctx.db.get_user_record(ctx.author.id)
 
         threshold = ctx.now - flags.duration
-        position = bisect_left(record.history, threshold, key=lambda entry: entry[0])
-        history = record.history[position:]
-        if not history:
+        position = bisect_left(record.history_timestamps, threshold)
+        dates = record.history_timestamps[position:]
+        if not dates:
             return 'No data to graph. Try specifying a larger timespan.', REPLY
 
-        history.append((ctx.now, UserHistoryEntry(record.wallet, record.total_coins)))
-        dates, values = zip(*history)
-        wallet, total = zip(*values)
-        values = total if flags.total else wallet  # This could be compressed into zip(*values)[flags.total]
+        if flags.total:
+            values = record.history_total[position:]
+            values.append(record.total_coins)
+        else:
+            values = record.history_wallet[position:]
+            values.append(record.wallet)
+        dates.append(ctx.now)
         target = 'Total Coins' if flags.total else 'Coins in Wallet'
 
-        with Image.new("RGB", (30, 30), (0, 0, 0)) as background:
-            buffer = BytesIO()
-            background.save(buffer, format="PNG")
-            buffer.seek(0)
+        buffer = BytesIO(_GRAPH_BACKGROUND_PNG)
 
         color = discord.Color.from_rgb(255, 255, 255)
         await send_graph_to(
@@ -932,21 +1025,33 @@ class Stats(Cog):
         if flags.duration and flags.duration < timedelta(minutes=2):
             return 'You must graph at least 2 minutes of data.', BAD_ARGUMENT
 
-        entries = await ctx.db.fetch(
-            'SELECT guild_count, timestamp FROM guild_count_graph_data WHERE timestamp >= $1 ORDER BY timestamp',
-            ctx.now - flags.duration if flags.duration else datetime.utcfromtimestamp(0),
-        )
+        # Downsample to at most ~500 points (the latest sample in each bucket), which is plenty for the chart
+        query = """
+                WITH span AS (
+                    SELECT GREATEST(EXTRACT(EPOCH FROM CURRENT_TIMESTAMP - MIN(timestamp)) / 500, 60) AS width
+                    FROM guild_count_graph_data {0}
+                )
+                SELECT DISTINCT ON (bucket) guild_count, timestamp
+                FROM (
+                    SELECT guild_count, timestamp, FLOOR(EXTRACT(EPOCH FROM timestamp) / span.width) AS bucket
+                    FROM guild_count_graph_data, span
+                    {0}
+                ) AS samples
+                ORDER BY bucket, timestamp DESC;
+                """
+        if flags.duration:
+            entries = await ctx.db.fetch(query.format('WHERE timestamp >= $1'), ctx.now - flags.duration)
+        else:
+            entries = await ctx.db.fetch(query.format(''))
         if not entries:
             return 'No data to graph. Try specifying a larger timespan.', REPLY
 
-        history = [(entry['timestamp'], entry['guild_count']) for entry in entries]
-        history.append((ctx.now, current := len(ctx.bot.guilds)))
+        dates = [entry['timestamp'] for entry in entries]
+        dates.append(ctx.now)
+        values = [entry['guild_count'] for entry in entries]
+        values.append(current := len(ctx.bot.guilds))
 
-        dates, values = zip(*history)
-        with Image.new("RGB", (30, 30), (0, 0, 0)) as background:
-            buffer = BytesIO()
-            background.save(buffer, format="PNG")
-            buffer.seek(0)
+        buffer = BytesIO(_GRAPH_BACKGROUND_PNG)
 
         color = discord.Color.from_rgb(255, 255, 255)
         label = f'the past {humanize_duration(flags.duration.total_seconds())}' if flags.duration else 'time'
@@ -966,10 +1071,28 @@ class Stats(Cog):
     @Cog.listener('on_guild_join')
     @Cog.listener('on_guild_remove')
     async def update_guild_count(self, _) -> None:
-        await self.bot.db.execute(
-            'INSERT INTO guild_count_graph_data (guild_count) VALUES ($1)',
-            len(self.bot.guilds),
-        )
+        # Coalesced into at most one insert per flush, since joins and leaves can arrive in bursts
+        self._guild_count_dirty = True
+
+    @tasks.loop(seconds=30)
+    async def flush_guild_count(self) -> None:
+        if not self._guild_count_dirty:
+            return
+
+        self._guild_count_dirty = False
+        try:
+            await self.bot.db.execute(
+                'INSERT INTO guild_count_graph_data (guild_count) VALUES ($1)',
+                len(self.bot.guilds),
+            )
+        except asyncio.CancelledError:
+            # cancelled mid-write by cog_unload; leave it for the final flush
+            self._guild_count_dirty = True
+            raise
+        except Exception:
+            # retry on the next iteration rather than letting the error stop the loop
+            log.exception('Failed to record guild count')
+            self._guild_count_dirty = True
 
 
 setup = Stats.simple_setup
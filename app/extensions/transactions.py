@@ -3,7 +3,7 @@ from __future__ import annotations
 import asyncio
 import datetime
 from collections import defaultdict
-from functools import partial
+from functools import lru_cache, partial
 from textwrap import dedent
 from typing import Any, Callable, Literal, NamedTuple, ValuesView, TYPE_CHECKING, TypeAlias
 
@@ -71,6 +71,99 @@ if TYPE_CHECKING:
     from app.core.timers import Timer
     from app.util.types import CommandResponse, TypedInteraction
 
+_BUYABLE_ITEMS: tuple[Item, ...] = tuple(item for item in walk_collection(Items, Item) if item.buyable)
+_ALL_RECIPES: tuple[Recipe, ...] = tuple(walk_collection(Recipes, Recipe))
+_ALL_BACKPACKS: tuple[Backpack, ...] = tuple(walk_collection(Backpacks, Backpack, method=vars))
+_RECIPE_OPTION_DESCRIPTIONS: tuple[tuple[Recipe, str], ...] = tuple(
+    (recipe, cutoff(recipe.description, max_length=50, exact=True)) for recipe in _ALL_RECIPES
+)
+
+
+class _ShopEntry(NamedTuple):
+    """Static, precomputed data for a buyable item, so shop searches don't recompute it per item per call."""
+    item: Item
+    name_lower: str
+    description_lower: str
+    brief: str
+
+
+_SHOP_ENTRIES: tuple[_ShopEntry, ...] = tuple(
+    _ShopEntry(item, item.name.lower(), item.description.lower(), cutoff(item.brief, max_length=100))
+    for item in _BUYABLE_ITEMS
+)
+
+
+def _index_shop_entries_by_type() -> dict[ItemType, tuple[_ShopEntry, ...]]:
+    index = defaultdict(list)
+    for entry in _SHOP_ENTRIES:
+        index[entry.item.type].append(entry)
+
+    return {key: tuple(entries) for key, entries in index.items()}
+
+
+_SHOP_ENTRIES_BY_TYPE: dict[ItemType, tuple[_ShopEntry, ...]] = _index_shop_entries_by_type()
+
+
+def _index_sellable_items() -> dict[tuple[ItemRarity, ItemType], tuple[Item, ...]]:
+    index = defaultdict(list)
+    for item in Items.all():
+        if item.sellable:
+            index[item.rarity, item.type].append(item)
+
+    return {key: tuple(items) for key, items in index.items()}
+
+
+_SELLABLE_ITEMS_BY_RARITY_AND_TYPE: dict[tuple[ItemRarity, ItemType], tuple[Item, ...]] = _index_sellable_items()
+
+_ALL_RARITIES: frozenset[ItemRarity] = frozenset(ItemRarity)
+_ALL_CATEGORIES: frozenset[ItemType] = frozenset(ItemType)
+_DEFAULT_SELL_RARITIES: frozenset[ItemRarity] = frozenset({ItemRarity.common, ItemRarity.uncommon, ItemRarity.rare})
+_DEFAULT_SELL_CATEGORIES: frozenset[ItemType] = _ALL_CATEGORIES - {
+    ItemType.crop, ItemType.collectible, ItemType.tool, ItemType.net, ItemType.crate,
+}
+
+
+def _render_sell_bulk_line(entry: tuple[Item, int]) -> str:
+    item, quantity = entry
+    return f'- {item.get_sentence_chunk(quantity)} worth {Emojis.coin} **{item.sell * quantity:,}**'
+
+
+_MAX_UNIQUE_ITEMS_REQUIREMENT: int = Items.count() - 4
+
+
+def _requirement_emoji(met: bool) -> str:
+    return Emojis.enabled if met else Emojis.disabled
+
+
+def _requirement_progress(ratio: float) -> str:
+    return f'{progress_bar(ratio)} ({min(ratio, 1.0):.1%})'
+
+
+_UPDATED_BALANCE = f'Wallet: {Emojis.coin} **{{wallet:,}}**\nBank: {Emojis.coin} **{{bank:,}}**'
+
+_RARITY_CHOICES: list[app_commands.Choice] = [
+    app_commands.Choice(name=rarity.name.title(), value=rarity.name) for rarity in ItemRarity
+]
+_CATEGORY_CHOICES: list[app_commands.Choice] = [
+    app_commands.Choice(name=cat.name.title(), value=cat.name) for cat in ItemType
+]
+
+
+# Items are static, so autocomplete results only depend on the (lowercased) query.
+# Discord only displays 25 choices, so there is no point in building or caching any more than that.
+@lru_cache(maxsize=2048)
+def _item_choices(query: str) -> tuple[app_commands.Choice, ...]:
+    return tuple(
+        app_commands.Choice(name=item.name, value=item.key)
+        for item in query_collection_many(Items, Item, query)[:25]
+    )
+
+
+@lru_cache(maxsize=2048)
+def _repairable_item_choices(query: str) -> tuple[app_commands.Choice, ...]:
+    repairable = [item for item in query_collection_many(Items, Item, query) if item.durability is not None]
+    return tuple(app_commands.Choice(name=item.name, value=item.key) for item in repairable[:25])
+
 
 class ItemTransformer(app_commands.Transformer):
     @classmethod
@@ -81,10 +174,7 @@ class ItemTransformer(app_commands.Transformer):
         return query_item(value)
 
     async def autocomplete(self, _, value: str) -> list[app_commands.Choice]:
-        return [
-            app_commands.Choice(name=item.name, value=item.key)
-            for item in query_collection_many(Items, Item, value)
-        ][:25]
+        return list(_item_choices(value.lower()))
 
 
 @converter
@@ -110,19 +200,16 @@ async def _SellBulkInvalidCatcher(_, value: str) -> commands.BadArgument:
 
 
 class DropView(discord.ui.View):
-    def __init__(self, ctx: Context, embed: discord.Embed, entity: str, record: UserRecord) -> None:
+    def __init__(self, ctx: Context, entity: str, record: UserRecord) -> None:
         super().__init__(timeout=120)
 
         self.ctx: Context = ctx
-        self.embed: discord.Embed = embed
         self.entity: str = entity
         self.record: UserRecord = record
 
         self.winner: discord.Member | None = None
         self._lock: asyncio.Lock = asyncio.Lock()
 
-        self.embed.set_footer(text='')
-
     @discord.ui.button(label='Claim!', style=discord.ButtonStyle.success)
     async def claim(self, interaction: TypedInteraction, button: discord.ui.Button) -> None:
         if self.winner:
@@ -132,8 +219,7 @@ class DropView(discord.ui.View):
             self.winner = interaction.user
             button.disabled = True
 
-            embed = self.embed
-            embed.colour = Colors.success
+            embed = discord.Embed(color=Colors.success, timestamp=self.ctx.now)
             embed.description = (
                 f'{self.ctx.author.mention} reclaimed their own drop of {self.entity}.'
                 if self.winner == self.ctx.author
@@ -162,10 +248,10 @@ class RecipeSelect(discord.ui.Select['RecipeView']):
                     label=recipe.name,
                     value=recipe.key,
                     emoji=recipe.emoji,
-                    description=cutoff(recipe.description, max_length=50, exact=True),
+                    description=description,
                     default=default == recipe,
                 )
-                for recipe in walk_collection(Recipes, Recipe)
+                for recipe, description in _RECIPE_OPTION_DESCRIPTIONS
             ],
             row=0,
         )
@@ -186,7 +272,7 @@ class RecipeView(UserView):
         self.ctx: Context = ctx
         self.record: UserRecord = record
 
-        self.current: Recipe = default or next(walk_collection(Recipes, Recipe))
+        self.current: Recipe = default or _ALL_RECIPES[0]
         self.input_lock: asyncio.Lock = asyncio.Lock()
 
         super().__init__(ctx.author, timeout=60)
@@ -227,57 +313,72 @@ class RecipeView(UserView):
 
     async def _craft(self, amount: int = 1, *, interaction: TypedInteraction = None) -> Any:
         respond_error = partial(interaction.response.send_message, ephemeral=True) if interaction else self.ctx.reply
-        respond = interaction.response.send_message if interaction else self.ctx.reply
-        extra = f' ({Emojis.coin} **{self.current.price * amount:,}** for {amount})' if amount > 1 else ''
+        recipe = self.current
+        cost = recipe.price * amount
+        extra = f' ({Emojis.coin} **{cost:,}** for {amount})' if amount > 1 else ''
 
-        if self.record.wallet < self.current.price * amount:
+        if self.record.wallet < cost:
             return await respond_error(
-                f'Insufficient funds: Crafting one of this item costs {Emojis.coin} **{self.current.price:,}**{extra}, '
+                f'Insufficient funds: Crafting one of this item costs {Emojis.coin} **{recipe.price:,}**{extra}, '
                 f'you only have {Emojis.coin} **{self.record.wallet:,}**.',
             )
 
         manager = self.record.inventory_manager
         quantity_of = manager.cached.quantity_of
 
-        if any(quantity_of(item) < quantity * amount for item, quantity in self.current.ingredients.items()):
-            extra = ', maybe try a lower amount?' if amount > 1 else ''
+        deltas = {}
+        for item, quantity in recipe.ingredients.items():
+            if quantity_of(item) < (needed := quantity * amount):
+                extra = ', maybe try a lower amount?' if amount > 1 else ''
 
-            return await respond_error(
-                f"You don't have enough of the required ingredients to craft this recipe{extra}",
-            )
-
-        async with self.record.db.acquire() as conn:
-            await self.record.add(wallet=-self.current.price * amount, connection=conn)
+                return await respond_error(
+                    f"You don't have enough of the required ingredients to craft this recipe{extra}",
+                )
+            deltas[item.key] = -needed
 
-            for item, quantity in self.current.ingredients.items():
-                await manager.add_item(item, -quantity * amount, connection=conn)
+        for item, quantity in recipe.result.items():
+            deltas[item.key] = deltas.get(item.key, 0) + quantity * amount
 
-            for item, quantity in self.current.result.items():
-                await manager.add_item(item, quantity * amount, connection=conn)
+        async with self.record.db.acquire() as conn, conn.transaction():
+            await self.record.add(wallet=-cost, connection=conn)
+            await manager.add_bulk(connection=conn, **deltas)
 
         embed = discord.Embed(color=Colors.success, timestamp=self.ctx.now)
         embed.set_author(name='Crafted Successfully', icon_url=self.ctx.author.display_avatar)
 
         embed.add_field(
             name='Crafted',
-            value='\n'.join(f'{item.display_name} x{quantity * amount:,}' for item, quantity in self.current.result.items()),
+            value='\n'.join(f'{item.display_name} x{quantity * amount:,}' for item, quantity in recipe.result.items()),
             inline=False
         )
 
         embed.add_field(
             name='Ingredients Used',
-            value=f'{Emojis.coin} {self.current.price * amount:,}\n' + '\n'.join(
-                f'{item.display_name} x{quantity * amount:,}' for item, quantity in self.current.ingredients.items()
+            value=f'{Emojis.coin} {cost:,}\n' + '\n'.join(
+                f'{item.display_name} x{quantity * amount:,}' for item, quantity in recipe.ingredients.items()
             ),
             inline=False,
         )
-        await respond(embed=embed)
+
+        if interaction is None:
+            return await self.ctx.reply(embed=embed)
+
+        # Show the result on the recipe message itself, refreshing the craft buttons along the way
+        self.update()
+        await interaction.response.edit_message(embeds=[self.build_embed(), embed], view=self)
 
     def _get_max(self) -> int:
-        inventory = self.record.inventory_manager
+        recipe = self.current
+        quantity_of = self.record.inventory_manager.cached.quantity_of
+
+        maximum = self.record.wallet // recipe.price
+        for item, quantity in recipe.ingredients.items():
+            if not maximum:
+                break
+            if (available := quantity_of(item) // quantity) < maximum:
+                maximum = available
 
-        item_max = min(inventory.cached.quantity_of(item) // quantity for item, quantity in self.current.ingredients.items())
-        return min(item_max, self.record.wallet // self.current.price)
+        return maximum
 
     @discord.ui.button(label='Craft One', style=discord.ButtonStyle.primary, row=1)
     async def craft_one(self, interaction: TypedInteraction, _) -> None:
@@ -332,6 +433,38 @@ TITLE = 0
 DESCRIPTION = 1
 
 
+@lru_cache(maxsize=None)
+def _render_item_general(item: Item) -> str:
+    return dedent(f"""
+        Name: {item.get_display_name(bold=True)}
+        Query Key: **`{item.key}`**
+        Type: **{item.type.name.title()}**
+        Rarity: {item.rarity.emoji} **{item.rarity.name.title()}**
+    """)
+
+
+@lru_cache(maxsize=None)
+def _render_item_flexibility(item: Item) -> str:
+    allowed = []
+    forbidden = []
+    for verb, value in (
+        ('buy', item.buyable),
+        ('sell', item.sellable),
+        ('use', item.usable),
+        ('remove', item.removable),
+        ('gift', item.giftable),
+    ):
+        target = allowed if value else forbidden
+        target.append(verb)
+
+    flexibility = []
+    if allowed:
+        flexibility.append(f'You can {humanize_list([f"**{verb}**" for verb in allowed])} this item.')
+    if forbidden:
+        flexibility.append(f'You *cannot* {humanize_list(forbidden, joiner="or")} this item.')
+    return '\n'.join(flexibility)
+
+
 def shop_paginator(
     ctx: Context,
     *,
@@ -345,46 +478,44 @@ def shop_paginator(
     query = query and query.lower()
     offset = query and len(query)
 
-    for i in walk_collection(Items, Item):
-        if not i.buyable:
-            continue
-        if type is not None and i.type is not type:
-            continue
+    embed.set_author(name='Item Shop', icon_url=ctx.author.display_avatar)
+    embed.description = (
+        f'To buy an item, use `{ctx.clean_prefix}buy`.\n'
+        f'To view information on an item, use `{ctx.clean_prefix}shop <item>`.'
+    )
+
+    wallet = record.wallet
+    quantity_of = inventory.cached.quantity_of
 
+    for i, name_lower, description_lower, brief in (
+        _SHOP_ENTRIES if type is None else _SHOP_ENTRIES_BY_TYPE.get(type, ())
+    ):
         loc = match_loc = None
         if query is not None:
-            if (loc := i.name.lower().find(query)) != -1:
+            if (loc := name_lower.find(query)) != -1:
                 match_loc = TITLE
-            elif i.key.find(query) != -1:
+            elif query in i.key:
                 pass
-            elif (loc := i.description.lower().find(query)) != -1 and len(i.description) + offset < 100:
+            elif len(i.description) + offset < 100 and (loc := description_lower.find(query)) != -1:
                 match_loc = DESCRIPTION
             else:
                 continue
 
-        embed.set_author(name='Item Shop', icon_url=ctx.author.display_avatar)
-        embed.description = (
-            f'To buy an item, use `{ctx.clean_prefix}buy`.\n'
-            f'To view information on an item, use `{ctx.clean_prefix}shop <item>`.'
-        )
-
-        comment = '*You cannot afford this item.*\n' if i.price > record.wallet else ''
-        owned = inventory.cached.quantity_of(i)
+        comment = '*You cannot afford this item.*\n' if i.price > wallet else ''
+        owned = quantity_of(i)
         owned = f'(You own {owned:,})' if owned else ''
 
-        description = cutoff(i.brief, max_length=100)
-
         end = loc and loc + offset
         name = i.name
 
         if match_loc == TITLE:
             name = f'{name[:loc]}**{name[loc:end]}**{name[end:]}'
         elif match_loc == DESCRIPTION:
-            description = f'{description[:loc]}**{description[loc:end]}**{description[end:]}'
+            brief = f'{brief[:loc]}**{brief[loc:end]}**{brief[end:]}'
 
         fields.append({
             'name': f'{i.emoji} {name} — {Emojis.coin} {i.price:,} {owned}',
-            'value': comment + description,
+            'value': comment + brief,
             'inline': False,
         })
     fields = fields or [{
@@ -423,7 +554,7 @@ class ShopCategorySelect(discord.ui.Select):
         *(
             discord.SelectOption(label=category.name.title(), value=str(category.value))
             for category in walk_collection(ItemType, ItemType)
-            if any(item.type is category and item.buyable for item in walk_collection(Items, Item))
+            if category in _SHOP_ENTRIES_BY_TYPE
         ),
         discord.SelectOption(label='Search...', value='search'),
     ]
@@ -562,7 +693,19 @@ class UnlockBackpack(discord.ui.Button['BackpacksView']):
             return await interaction.followup.send('Cancelled.', ephemeral=True)
 
         async with get_transaction_lock(container.ctx, update_jump_url=True):
-            updated = list(set(b.key for b in record.unlocked_backpacks) | {self.backpack.key})
+            # The confirmation prompt runs outside the lock, so re-validate now that we hold it
+            if record.wallet < self.backpack.price:
+                return await interaction.followup.send(
+                    f'You no longer have enough coins in your wallet to unlock **{self.backpack.name}**.',
+                    ephemeral=True,
+                )
+            if self.backpack in record.unlocked_backpacks:
+                return await interaction.followup.send(
+                    f'You have already unlocked **{self.backpack.name}**.', ephemeral=True,
+                )
+
+            updated = [b.key for b in record.unlocked_backpacks]
+            updated.append(self.backpack.key)
             async with container.ctx.db.acquire() as conn:
                 await record.add(wallet=-self.backpack.price, connection=conn)
                 await record.update(unlocked_backpacks=updated, connection=conn)
@@ -589,13 +732,18 @@ class BackpacksContainer(discord.ui.Container['BackpacksView']):
         self.add_item(discord.ui.TextDisplay(f'## Backpack Shop'))
         self._btn_mapping: dict[Backpack, discord.ui.Button] = {}
 
-        for backpack in walk_collection(Backpacks, Backpack, method=vars):
-            self.add_item(discord.ui.Separator()).add_item(self.render_backpack(backpack))
+        # Resolve these once rather than once per backpack, since both properties re-resolve keys on every access
+        unlocked = self.record.unlocked_backpacks
+        equipped = self.record.equipped_backpack
+        for backpack in _ALL_BACKPACKS:
+            self.add_item(discord.ui.Separator()).add_item(self.render_backpack(backpack, unlocked, equipped))
 
-    def render_backpack(self, backpack: Backpack) -> discord.ui.Section:
-        if backpack in self.record.unlocked_backpacks:
+    def render_backpack(
+        self, backpack: Backpack, unlocked: list[Backpack], equipped: Backpack,
+    ) -> discord.ui.Section:
+        if backpack in unlocked:
             accessory = EquipBackpack(backpack, container=self)
-            accessory.update(equipped=backpack is self.record.equipped_backpack)
+            accessory.update(equipped=backpack is equipped)
         else:
             accessory = UnlockBackpack(
                 backpack,
@@ -638,6 +786,11 @@ class SellBulkFlags(Flags):
     keep_one = store_true(name='keep-one', aliases=('ko', 'keepone', 'keep-1', 'keep1', 'k1'), short='k')
 
 
+# Slash command invocations only vary in keep_one, and sell_bulk never mutates its flags
+_SELL_BULK_APP_FLAGS = DottedDict(all_rarities=False, all_categories=False, all=False, keep_one=False)
+_SELL_BULK_APP_FLAGS_KEEP_ONE = DottedDict(all_rarities=False, all_categories=False, all=False, keep_one=True)
+
+
 class ActiveRepairJob(NamedTuple):
     item: Item
     start: datetime.datetime
@@ -651,7 +804,8 @@ class Transactions(Cog):
 
     def __setup__(self) -> None:
         self._fetch_active_repair_jobs_task = self.bot.loop.create_task(self._fetch_active_repair_jobs())
-        self.active_repair_jobs: defaultdict[int, dict[int, ActiveRepairJob]] = defaultdict(dict)
+        # user_id -> timer_id -> job; users without active jobs have no entry at all
+        self.active_repair_jobs: dict[int, dict[int, ActiveRepairJob]] = {}
 
     async def _fetch_active_repair_jobs(self) -> None:
         query = """
@@ -667,8 +821,10 @@ class Transactions(Cog):
                 """
 
         await self.bot.db.wait()
+        jobs = self.active_repair_jobs
+
         for record in await self.bot.db.fetch(query):
-            self.active_repair_jobs[record['user_id']][record['id']] = ActiveRepairJob(
+            jobs.setdefault(record['user_id'], {})[record['id']] = ActiveRepairJob(
                 item=get_by_key(Items, record['item']),
                 start=record['created_at'],
                 end=record['expires'],
@@ -700,10 +856,7 @@ class Transactions(Cog):
         embed.set_author(name=f"Successful Transaction: {ctx.author}", icon_url=ctx.author.avatar)
 
         embed.description = f"Withdrew {Emojis.coin} **{amount:,}** from your bank."
-        embed.add_field(name="Updated Balance", value=dedent(f"""
-            Wallet: {Emojis.coin} **{data.wallet:,}**
-            Bank: {Emojis.coin} **{data.bank:,}**
-        """))
+        embed.add_field(name="Updated Balance", value=_UPDATED_BALANCE.format(wallet=data.wallet, bank=data.bank))
 
         view = discord.ui.View(timeout=60)
         view.add_item(ModalButton(
@@ -732,10 +885,7 @@ class Transactions(Cog):
         embed.set_author(name=f"Successful Transaction: {ctx.author}", icon_url=ctx.author.avatar)
 
         embed.description = f"Deposited {Emojis.coin} **{amount:,}** into your bank."
-        embed.add_field(name="Updated Balance", value=dedent(f"""
-            Wallet: {Emojis.coin} **{data.wallet:,}**
-            Bank: {Emojis.coin} **{data.bank:,}**
-        """))
+        embed.add_field(name="Updated Balance", value=_UPDATED_BALANCE.format(wallet=data.wallet, bank=data.bank))
 
         view = discord.ui.View(timeout=60)
         view.add_item(ModalButton(
@@ -772,14 +922,9 @@ class Transactions(Cog):
 
         embed.title = f'{item.display_name} ({owned:,} owned)'
         embed.description = item.description
-        embed.set_thumbnail(url=image_url_from_emoji(item.emoji))
+        embed.set_thumbnail(url=item.thumbnail_url)
 
-        embed.add_field(name='General', value=dedent(f"""
-            Name: {item.get_display_name(bold=True)}
-            Query Key: **`{item.key}`**
-            Type: **{item.type.name.title()}**
-            Rarity: {item.rarity.emoji} **{item.rarity.name.title()}**
-        """))
+        embed.add_field(name='General', value=_render_item_general(item))
 
         then = '\n' + Emojis.Expansion.standalone
         buy_text = f"""\
@@ -793,24 +938,11 @@ class Transactions(Cog):
             {f'{then} Total {Emojis.coin} **{item.sell * owned:,}** for the {owned:,} you own' if item.sellable and owned else ''}
         """), inline=False)
 
-        allowed = []
-        forbidden = []
-        for verb, value in (
-            ('buy', item.buyable),
-            ('sell', item.sellable),
-            ('use', item.usable),
-            ('remove', item.removable),
-            ('gift', item.giftable),
-        ):
-            target = allowed if value else forbidden
-            target.append(verb)
+        embed.add_field(name='Flexibility', value=_render_item_flexibility(item), inline=False)
 
-        flexibility = []
-        if allowed:
-            flexibility.append(f'You can {humanize_list([f"**{verb}**" for verb in allowed])} this item.')
-        if forbidden:
-            flexibility.append(f'You *cannot* {humanize_list(forbidden, joiner="or")} this item.')
-        embed.add_field(name='Flexibility', value='\n'.join(flexibility), inline=False)
+        if not item.sellable and not item.usable:
+            # No buttons to show, so skip constructing a view entirely
+            return embed, REPLY
 
         view = discord.ui.View(timeout=120)
         check = lambda itx: itx.user == ctx.author
@@ -870,16 +1002,16 @@ class Transactions(Cog):
             )
 
         async with ctx.db.acquire() as conn:
-            await record.add_random_exp(10, 15, chance=0.5, ctx=ctx, connection=conn)
-            await record.add_random_bank_space(10, 15, chance=0.5, connection=conn)
-
-            await record.add(wallet=-price + money_back, connection=conn)
+            await record.add_with_random_gains(
+                exp=(10, 15), exp_chance=0.5, bank_space=(10, 15), bank_space_chance=0.5,
+                wallet=-price + money_back, ctx=ctx, connection=conn,
+            )
             await inventory.add_item(item, quantity, connection=conn)
 
         embed = discord.Embed(color=Colors.success, timestamp=ctx.now)
         embed.description = f'You bought {item.get_sentence_chunk(quantity)} for {Emojis.coin} **{price:,}** coins.'
         embed.set_author(name=f'Successful Purchase: {ctx.author}', icon_url=ctx.author.display_avatar)
-        embed.set_thumbnail(url=image_url_from_emoji(item.emoji))
+        embed.set_thumbnail(url=item.thumbnail_url)
 
         if money_back and money_back_text:
             embed.add_field(name='Money Back', value='\n'.join(f'- {line}' for line in money_back_text), inline=False)
@@ -918,22 +1050,26 @@ class Transactions(Cog):
 
         record = await ctx.db.get_user_record(ctx.author.id)
         inventory = record.inventory_manager
-        quests = await record.quest_manager.wait()
+        quests = record.quest_manager
 
         async with ctx.db.acquire() as conn:
-            await record.add_random_exp(10, 15, chance=0.4, ctx=ctx, connection=conn)
-            await record.add_random_bank_space(10, 15, chance=0.4, connection=conn)
-
-            await record.add(wallet=value, connection=conn)
+            await record.add_with_random_gains(
+                exp=(10, 15), exp_chance=0.4, bank_space=(10, 15), bank_space_chance=0.4,
+                wallet=value, ctx=ctx, connection=conn,
+            )
             await inventory.add_item(item, -quantity, connection=conn)
 
+            # Quests are loaded alongside the record, so this is almost always already done by now
+            if not quests.fetched:
+                await quests.wait()
+
             if quest := quests.get_active_quest(QuestTemplates.sell_items):
                 await quest.add_progress(value, connection=conn)
 
         embed = discord.Embed(color=Colors.success, timestamp=ctx.now)
         embed.description = f'You sold {item.get_sentence_chunk(quantity)} in exchange for {Emojis.coin} **{value:,}** coins.'
         embed.set_author(name=f'Successful Transaction: {ctx.author}', icon_url=ctx.author.display_avatar)
-        embed.set_thumbnail(url=image_url_from_emoji(item.emoji))
+        embed.set_thumbnail(url=item.thumbnail_url)
 
         return embed, REPLY
 
@@ -997,52 +1133,59 @@ class Transactions(Cog):
         if all(not quantity for quantity in inventory.cached.values()):
             return 'You don\'t have any items to sell.', REPLY
 
-        if error := discord.utils.find(lambda e: isinstance(e, commands.BadArgument), entities):
-            raise error
-        rarities: set[ItemRarity] = set(r for r in entities if isinstance(r, ItemRarity))
-        categories: set[ItemType] = set(c for c in entities if isinstance(c, ItemType))
+        rarities: set[ItemRarity] = set()
+        categories: set[ItemType] = set()
+        for entity in entities:
+            if isinstance(entity, commands.BadArgument):
+                raise entity
+            elif isinstance(entity, ItemRarity):
+                rarities.add(entity)
+            elif isinstance(entity, ItemType):
+                categories.add(entity)
+
+        rarity_filter = frozenset(rarities) or _DEFAULT_SELL_RARITIES
+        category_filter = frozenset(categories) or _DEFAULT_SELL_CATEGORIES
 
         if flags.all or flags.all_rarities:
-            rarities = set(ItemRarity)
+            rarity_filter = _ALL_RARITIES
         elif flags.all or flags.all_categories:
-            categories = set(ItemType)
-
-        rarities = rarities or {ItemRarity.common, ItemRarity.uncommon, ItemRarity.rare}
-        categories = categories or (
-            set(ItemType) - {ItemType.crop, ItemType.collectible, ItemType.tool, ItemType.net, ItemType.crate}
-        )
+            category_filter = _ALL_CATEGORIES
         keep = 1 if flags.keep_one else 0
 
+        eligible = {
+            item
+            for (rarity, category), candidates in _SELLABLE_ITEMS_BY_RARITY_AND_TYPE.items()
+            if rarity in rarity_filter and category in category_filter
+            for item in candidates
+        }
         items = {
-            item: quantity - keep
-            for item, quantity in inventory.cached.items()
-            if item.sellable and quantity > keep and item.rarity in rarities and item.type in categories
+            item: quantity - keep for item, quantity in inventory.cached.items() if quantity > keep and item in eligible
         }
         if not items:
             return 'You do not have any sellable items in your inventory that match the provided constraints.', REPLY
 
-        total = sum(item.sell * quantity for item, quantity in items.items())
-        count = sum(items.values())
+        total = count = 0
+        for item, quantity in items.items():
+            total += item.sell * quantity
+            count += quantity
+
+        # Lines are only rendered for the page being shown
+        entries = list(items.items())
 
         embed = discord.Embed(color=Colors.warning, timestamp=ctx.now)
         embed.set_author(name=f'Confirm Bulk Sell: {ctx.author}', icon_url=ctx.author.display_avatar)
-
-        friendly = [
-            f'- {item.get_sentence_chunk(quantity)} worth {Emojis.coin} **{item.sell * quantity:,}**'
-            for item, quantity in items.items()
-        ]
         s = 's' if count != 1 else ''
         description = (
             f'You are about to sell **{count:,}** item{s} in bulk:\n{{}}\nTotal: {Emojis.coin} **{total:,}**'
         )
-        paginator = Paginator(ctx, LineBasedFormatter(embed, friendly, description, per_page=15))
+        paginator = Paginator(ctx, LineBasedFormatter(
+            embed, entries, description, per_page=15, line_factory=_render_sell_bulk_line,
+        ))
         if not await ctx.confirm(paginator=paginator, true='Confirm Bulk Sell'):
             return 'Alright, looks like we won\'t bulk sell today.', EDIT, dict(view=None)
 
         async with ctx.db.acquire() as conn:
-            payload = {item.key: -quantity for item, quantity in items.items()}
-            await record.inventory_manager.add_bulk(**payload, connection=conn)
-            await record.add(wallet=total, connection=conn)
+            await record.sell_items(items, wallet=total, connection=conn)
 
         embed = discord.Embed(color=Colors.success, timestamp=ctx.now)
         embed.set_author(name=f'Successful Transaction: {ctx.author}', icon_url=ctx.author.display_avatar)
@@ -1050,7 +1193,9 @@ class Transactions(Cog):
             f'Successfully sold **{count:,}** item{s} for {Emojis.coin} **{total:,}**:\n{{}}'
         )
 
-        paginator = Paginator(ctx, LineBasedFormatter(embed, friendly, description, per_page=15))
+        paginator = Paginator(ctx, LineBasedFormatter(
+            embed, entries, description, per_page=15, line_factory=_render_sell_bulk_line,
+        ))
         return paginator, EDIT
 
     @sell_bulk.define_app_command()
@@ -1060,8 +1205,8 @@ class Transactions(Cog):
         keep_one='Whether to keep one of every item that would otherwise be sold.',
     )
     @app_commands.choices(
-        rarity=[app_commands.Choice(name=rarity.name.title(), value=rarity.name) for rarity in ItemRarity],
-        category=[app_commands.Choice(name=cat.name.title(), value=cat.name) for cat in ItemType],
+        rarity=_RARITY_CHOICES,
+        category=_CATEGORY_CHOICES,
     )
     @app_commands.rename(keep_one='keep-one')
     async def sell_bulk_app_command(
@@ -1076,7 +1221,7 @@ class Transactions(Cog):
         if category:
             category = ItemType[category.lower()]
 
-        flags = DottedDict(all_rarities=False, all_categories=False, all=False, keep_one=keep_one)
+        flags = _SELL_BULK_APP_FLAGS_KEEP_ONE if keep_one else _SELL_BULK_APP_FLAGS
         await ctx.invoke(ctx.command, (rarity, category), flags=flags)  # type: ignore
 
     @command(aliases={'u', 'consume', 'activate', 'open'}, hybrid=True, with_app_command=False)
@@ -1089,8 +1234,9 @@ class Transactions(Cog):
         record = await ctx.db.get_user_record(ctx.author.id)
 
         async with ctx.db.acquire() as conn:
-            await record.add_random_exp(10, 15, chance=0.5, ctx=ctx, connection=conn)
-            await record.add_random_bank_space(10, 15, chance=0.4, connection=conn)
+            await record.add_with_random_gains(
+                exp=(10, 15), exp_chance=0.5, bank_space=(10, 15), bank_space_chance=0.4, ctx=ctx, connection=conn,
+            )
 
             quantity = await item.use(ctx, quantity)
 
@@ -1122,8 +1268,9 @@ class Transactions(Cog):
         record = await ctx.db.get_user_record(ctx.author.id)
 
         async with ctx.db.acquire() as conn:
-            await record.add_random_exp(10, 15, chance=0.4, ctx=ctx, connection=conn)
-            await record.add_random_bank_space(10, 15, chance=0.4, connection=conn)
+            await record.add_with_random_gains(
+                exp=(10, 15), exp_chance=0.4, bank_space=(10, 15), bank_space_chance=0.4, ctx=ctx, connection=conn,
+            )
 
             await item.remove(ctx)
 
@@ -1132,10 +1279,7 @@ class Transactions(Cog):
     @shop.autocomplete('item')
     @remove.autocomplete('item')
     async def item_autocomplete(self, _, current: str) -> list[app_commands.Choice]:
-        return [
-            app_commands.Choice(name=item.name, value=item.key)
-            for item in query_collection_many(Items, Item, current)
-        ]
+        return list(_item_choices(current.lower()))
 
     @command(aliases={'bp', 'backpack'}, hybrid=True)
     @simple_cooldown(3, 6)
@@ -1154,7 +1298,7 @@ class Transactions(Cog):
         record = await ctx.db.get_user_record(ctx.author.id)
         inventory = await record.inventory_manager.wait()
         if item is None:
-            formatter = RepairListFormatter(record, self.active_repair_jobs[ctx.author.id].values())
+            formatter = RepairListFormatter(record, self.active_repair_jobs.get(ctx.author.id, {}).values())
             return Paginator(ctx, formatter, other_components=[ActiveRepairRow()]), REPLY
 
         if inventory.cached.quantity_of(item) <= 0:
@@ -1191,13 +1335,13 @@ class Transactions(Cog):
             await inventory.reset_damage(item, connection=conn)
 
         timer = await ctx.bot.timers.create(time, 'repair', user_id=ctx.author.id, item=item.key)
-        self.active_repair_jobs[ctx.author.id][timer.id] = (
+        self.active_repair_jobs.setdefault(ctx.author.id, {})[timer.id] = (
             ActiveRepairJob(item=item, start=timer.created_at, end=timer.expires)
         )
 
         embed = discord.Embed(color=Colors.success, timestamp=ctx.now)
         embed.set_author(name=f'Repairing Item: {ctx.author.name}', icon_url=ctx.author.display_avatar)
-        embed.set_thumbnail(url=image_url_from_emoji(item.emoji))
+        embed.set_thumbnail(url=item.thumbnail_url)
         embed.description = (
             f'**{item.display_name}** is now being repaired for {Emojis.coin} **{price:,}**.\n'
             f'{Emojis.Expansion.first} The repair will finish {discord.utils.format_dt(timer.expires, "R")}.\n'
@@ -1215,17 +1359,16 @@ class Transactions(Cog):
 
         record = await self.bot.db.get_user_record(user_id)
         await record.inventory_manager.add_item(item, 1)
-        self.active_repair_jobs[user_id].pop(timer.id, None)
+        if jobs := self.active_repair_jobs.get(user_id):
+            jobs.pop(timer.id, None)
+            if not jobs:
+                del self.active_repair_jobs[user_id]
 
         await record.notifications_manager.add_notification(NotificationData.RepairFinished(key))
 
     @repair.autocomplete('item')
     async def repair_autocomplete(self, _, current: str) -> list[app_commands.Choice]:
-        return [
-            app_commands.Choice(name=item.name, value=item.key)
-            for item in query_collection_many(Items, Item, current)
-            if item.durability is not None
-        ]
+        return list(_repairable_item_choices(current.lower()))
 
     @command(aliases={'give', 'gift', 'donate', 'pay'}, hybrid=True, with_app_command=False)
     @simple_cooldown(1, 30)
@@ -1264,13 +1407,10 @@ class Transactions(Cog):
                 updated = f'{Emojis.coin} **{record.wallet:,}**', f'{Emojis.coin} **{their_record.wallet:,}**'
             else:
                 # noinspection PyUnboundLocalVariable
-                await record.inventory_manager.add_item(item, -quantity, connection=conn)
-                await their_record.inventory_manager.add_item(item, quantity, connection=conn)
+                ours = await record.inventory_manager.add_item(item, -quantity, connection=conn)
+                theirs = await their_record.inventory_manager.add_item(item, quantity, connection=conn)
 
-                updated = (
-                    f'{item.emoji} {item.name} x{record.inventory_manager.cached.quantity_of(item):,}',
-                    f'{item.emoji} {item.name} x{their_record.inventory_manager.cached.quantity_of(item):,}',
-                )
+                updated = f'{item.emoji} {item.name} x{ours:,}', f'{item.emoji} {item.name} x{theirs:,}'
 
             await their_record.notifications_manager.add_notification(
                 (
@@ -1350,7 +1490,7 @@ class Transactions(Cog):
         embed.description = f'{ctx.author.mention} has dropped {entity_human}!'
         embed.set_footer(text=f'Click the button below to retrieve your {entity_type}!')
 
-        view = DropView(ctx, embed, entity_human, record)
+        view = DropView(ctx, entity_human, record)
         yield '', embed, view, EDIT, NO_EXTRA
 
         embed.set_footer(text='')
@@ -1409,7 +1549,7 @@ class Transactions(Cog):
     async def recipe_autocomplete(self, _, current: str) -> list[app_commands.Choice]:
         return [
             app_commands.Choice(name=recipe.name, value=recipe.key)
-            for recipe in query_collection_many(Recipes, Recipe, current)
+            for recipe in query_collection_many(Recipes, Recipe, current)[:25]
         ]
 
     PRESTIGE_WHAT_DO_I_LOSE = (
@@ -1446,12 +1586,10 @@ class Transactions(Cog):
         bank_requirement = next_prestige * 50_000
         meets_bank = record.bank >= bank_requirement
 
-        unique_items = sum(value > 0 for value in inventory.cached.values())
-        unique_items_requirement = min(48 + next_prestige * 2, len(list(Items.all())) - 4)
+        unique_items = inventory.unique_count
+        unique_items_requirement = min(48 + next_prestige * 2, _MAX_UNIQUE_ITEMS_REQUIREMENT)
         meets_unique_items = unique_items >= unique_items_requirement
 
-        _ = lambda b: Emojis.enabled if b else Emojis.disabled
-        progress = lambda ratio: f'{progress_bar(ratio)} ({min(ratio, 1.0):.1%})'
         embed = discord.Embed(
             color=Colors.primary,
             timestamp=ctx.now,
@@ -1462,18 +1600,18 @@ class Transactions(Cog):
         )
         embed.set_author(name=f'Prestige: {ctx.author}', icon_url=ctx.author.display_avatar)
         embed.add_field(
-            name=f'{_(meets_level)} Level **{record.level}**/{level_requirement:,}',
-            value=progress(record.level / level_requirement),
+            name=f'{_requirement_emoji(meets_level)} Level **{record.level}**/{level_requirement:,}',
+            value=_requirement_progress(record.level / level_requirement),
             inline=False,
         )
         embed.add_field(
-            name=f'{_(meets_bank)} Coins in Bank: {Emojis.coin} **{record.bank:,}**/{bank_requirement:,}',
-            value=progress(record.bank / bank_requirement),
+            name=f'{_requirement_emoji(meets_bank)} Coins in Bank: {Emojis.coin} **{record.bank:,}**/{bank_requirement:,}',
+            value=_requirement_progress(record.bank / bank_requirement),
             inline=False,
         )
         embed.add_field(
-            name=f'{_(meets_unique_items)} Unique Items: **{unique_items}**/{unique_items_requirement}',
-            value=progress(unique_items / unique_items_requirement),
+            name=f'{_requirement_emoji(meets_unique_items)} Unique Items: **{unique_items}**/{unique_items_requirement}',
+            value=_requirement_progress(unique_items / unique_items_requirement),
             inline=False,
         )
         if meets_level and meets_bank and meets_unique_items:
@@ -29,7 +29,6 @@ from app.util.common import (
     executor_function,
     get_by_key,
     humanize_duration,
-    image_url_from_emoji,
     progress_bar,
     weighted_choice,
 )
@@ -450,7 +449,7 @@ class DiggingContainer(ui.Container['DiggingView']):
                 f'-# Occupies {cell.item.volume:,} storage unit{s}'
             )
 
-        self._target_info.accessory = ui.Thumbnail(media=image_url_from_emoji(cell.item.emoji)) if cell.item else None
+        self._target_info.accessory = ui.Thumbnail(media=cell.item.thumbnail_url) if cell.item else None
 
         btn = self._target_row.dig
         if cell.item and cell.item.type is ItemType.ore:
@@ -630,7 +629,7 @@ class DiggingActionRow(ui.ActionRow['DiggingView']):
 
         embed = Embed(timestamp=utcnow(), color=Colors.success)
         embed.set_author(name='Used Railgun!')
-        embed.set_thumbnail(url=image_url_from_emoji(Items.railgun.emoji))
+        embed.set_thumbnail(url=Items.railgun.thumbnail_url)
         embed.add_field(name='You collected:', value=display, inline=False)
 
         self.view.container.update()
@@ -650,7 +649,7 @@ class DiggingActionRow(ui.ActionRow['DiggingView']):
         embed = Embed(timestamp=utcnow(), color=Colors.success)
         embed.description = f'\U0001f4a5 Dealt **{round(total_hp)} HP** to surrounding blocks!'
         embed.set_author(name='Used Dynamite!')
-        embed.set_thumbnail(url=image_url_from_emoji(Items.dynamite.emoji))
+        embed.set_thumbnail(url=Items.dynamite.thumbnail_url)
         embed.add_field(name='You collected:', value=display, inline=False)
 
         self.view.container.update()
@@ -972,7 +971,7 @@ class DiggingSession:
         for row in self.grid[self.y_range.start:self.y_range.stop]:
             for cell in row:
                 if cell and cell.item is not None and cell.item not in self.image_cache:
-                    fp = await self.fetch_bytes(image_url_from_emoji(cell.item.emoji))
+                    fp = await self.fetch_bytes(cell.item.thumbnail_url)
                     image = await self.open_sized(fp, (self.OVERLAY_WIDTH, self.OVERLAY_WIDTH))
                     self.image_cache[cell.item] = image
 
@@ -7,7 +7,7 @@ import random
 import re
 from bisect import bisect
 from difflib import SequenceMatcher
-from functools import wraps
+from functools import lru_cache, wraps
 from typing import (
     Any,
     Awaitable,
@@ -238,14 +238,30 @@ def walk_collection(
         yield obj
 
 
-def get_by_key(collection: type, key: str) -> Any:
+_KEY_INDEXES: dict[type, dict[str, Any]] = {}
+
+
+def _build_key_index(collection: type) -> dict[str, Any]:
+    index = {}
     for attr in dir(collection):
         if attr.startswith('_'):
             continue
 
         obj = getattr(collection, attr)
-        if hasattr(obj, 'key') and obj.key == key:
-            return obj
+        if hasattr(obj, 'key'):
+            index.setdefault(obj.key, obj)
+
+    return index
+
+
+def get_by_key(collection: type, key: str) -> Any:
+    # Collections are static, so each one is indexed by key on first lookup
+    try:
+        index = _KEY_INDEXES[collection]
+    except KeyError:
+        index = _KEY_INDEXES[collection] = _build_key_index(collection)
+
+    return index.get(key)
 
 
 def query_collection_many(
@@ -402,31 +418,15 @@ def expansion_list(entries: Iterable[str]) -> str:
     return '\n'.join(result)
 
 
-def progress_bar(ratio: float, *, length: int = 8, u200b: bool = True, provider: type = Emojis.ProgressBars) -> str:
-    # noinspection PyTypeChecker
-    ratio = min(1, max(0, ratio))
+_PROGRESS_BAR_KEYS = ('empty', 'low', 'mid', 'high', 'full')
 
-    result = ''
-    span = 1 / length
 
-    # Pre-calculate spans
-    quarter_span = span / 4
-    half_span = span / 2
-    high_span = 3 * quarter_span
+@lru_cache(maxsize=4096)
+def _render_progress_bar(filled: int, length: int, u200b: bool, provider: type) -> str:
+    result = ''
 
     for i in range(length):
-        lower = i / length
-
-        if ratio <= lower:
-            key = 'empty'
-        elif ratio <= lower + quarter_span:
-            key = 'low'
-        elif ratio <= lower + half_span:
-            key = 'mid'
-        elif ratio <= lower + high_span:
-            key = 'high'
-        else:
-            key = 'full'
+        key = _PROGRESS_BAR_KEYS[min(4, max(0, filled - 4 * i))]
 
         if i == 0:
             start = 'left'
@@ -443,6 +443,16 @@ def progress_bar(ratio: float, *, length: int = 8, u200b: bool = True, provider:
     return result
 
 
+def progress_bar(ratio: float, *, length: int = 8, u200b: bool = True, provider: type = Emojis.ProgressBars) -> str:
+    # noinspection PyTypeChecker
+    ratio = min(1, max(0, ratio))
+
+    # Each segment has four partially filled states, so the rendered bar only depends on how many
+    # quarter-segments the ratio covers. Quantize to that before hitting the cache.
+    filled = math.ceil(round(ratio * length * 4, 6))
+    return _render_progress_bar(filled, length, u200b, provider)
+
+
 @overload
 def pick(d: Mapping[str, V], /, *keys: str, **transform_keys: V) -> dict[str, V]:
     ...
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from copy import deepcopy
-from typing import Any, Collection, Generic, TYPE_CHECKING, TypeVar
+from typing import Any, Callable, Collection, Generic, TYPE_CHECKING, TypeVar
 
 import discord
 from discord import ButtonStyle, Embed, File, Interaction
@@ -286,23 +286,38 @@ class Formatter(ABC, Generic[T]):
 
 
 class LineBasedFormatter(Formatter[str]):
+    """Formats pages of lines of text.
+
+    If ``line_factory`` is given, entries are raw objects and only the current page's lines are built,
+    by calling ``line_factory(entry)``.
+    """
+
     def __init__(
         self,
         embed: Embed,
-        lines: list[str],
+        lines: list[str] | list[Any],
         formatting: str = '{}',
         *,
         per_page: int = 10,
         field_name: str | None = None,
         insert_field_at: int | None = None,
+        line_factory: Callable[[Any], str] | None = None,
     ) -> None:
         self.formatting: str = formatting
         self.embed: Embed = embed
         self.field_name: str | None = field_name
         self.insert_field_at: int | None = insert_field_at
+        self.line_factory: Callable[[Any], str] | None = line_factory
 
         super().__init__(lines, per_page=per_page)
 
+    def get_page(self, page: int, /) -> list[str]:
+        entries = super().get_page(page)
+        if self.line_factory is None:
+            return entries
+
+        return list(map(self.line_factory, entries))
+
     async def format_page(self, paginator: Paginator, lines: list[str]) -> Embed | File:
         embed = Embed.from_dict(deepcopy(self.embed.to_dict()))
 
@@ -319,19 +334,35 @@ class LineBasedFormatter(Formatter[str]):
 
 
 class FieldBasedFormatter(Formatter[dict[str, V]]):
+    """Formats pages of embed fields.
+
+    If ``field_factory`` is given, entries are raw objects and each page's fields are built on demand
+    by calling ``field_factory(index, entry)``, where ``index`` is the entry's 1-based position.
+    """
+
     def __init__(
         self,
         embed: Embed,
-        field_kwargs: list[dict[str, V]],
+        field_kwargs: list[dict[str, V]] | list[Any],
         *,
         page_in_footer: bool = False,
         per_page: int = 5,
+        field_factory: Callable[[int, Any], dict[str, V]] | None = None,
     ) -> None:
         self.embed: Embed = embed
         self.page_in_footer: bool = page_in_footer
+        self.field_factory: Callable[[int, Any], dict[str, V]] | None = field_factory
 
         super().__init__(field_kwargs, per_page=per_page)
 
+    def get_page(self, page: int, /) -> list[dict[str, V]]:
+        entries = super().get_page(page)
+        if self.field_factory is None:
+            return entries
+
+        factory = self.field_factory
+        return [factory(idx, entry) for idx, entry in enumerate(entries, start=page * self.per_page + 1)]
+
     async def format_page(self, paginator: Paginator, fields: list[dict[str, V]]) -> Embed | File:
         embed = Embed.from_dict(deepcopy(self.embed.to_dict()))
         for field in fields:
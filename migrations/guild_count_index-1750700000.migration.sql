@@ -0,0 +1 @@
+CREATE INDEX IF NOT EXISTS guild_count_graph_data_timestamp_idx ON guild_count_graph_data (timestamp);
@@ -0,0 +1,50 @@
+import random
+from bisect import bisect
+
+import pytest
+
+pytest.importorskip('discord')
+
+from app.extensions.profit import _dive_hazard_thresholds, _pressure_chance
+
+DEPTHS = (50, 100, 500, 1000, 2500)
+
+
+def _baseline_outcome(depth: int, rand) -> int:
+    """The original sequence of independent rolls that a single draw replaces."""
+    if depth > 50 and rand() < _pressure_chance(depth):
+        return 0
+    if rand() < 0.01:
+        return 1
+    if rand() < 0.13:
+        return 2
+    return 3
+
+
+@pytest.mark.parametrize('depth', DEPTHS)
+def test_thresholds_match_sequential_rolls(depth: int) -> None:
+    pressure = _pressure_chance(depth) if depth > 50 else 0.0
+    expected = (
+        pressure,
+        (1 - pressure) * 0.01,
+        (1 - pressure) * 0.99 * 0.13,
+    )
+    thresholds = _dive_hazard_thresholds(depth)
+    bands = (thresholds[0], thresholds[1] - thresholds[0], thresholds[2] - thresholds[1])
+    assert bands == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('depth', DEPTHS)
+def test_outcome_frequencies_match_baseline(depth: int) -> None:
+    trials = 200_000
+    rng = random.Random(depth)
+    thresholds = _dive_hazard_thresholds(depth)
+
+    baseline = [0] * 4
+    single = [0] * 4
+    for _ in range(trials):
+        baseline[_baseline_outcome(depth, rng.random)] += 1
+        single[bisect(thresholds, rng.random())] += 1
+
+    for old, new in zip(baseline, single):
+        assert new / trials == pytest.approx(old / trials, abs=0.005)